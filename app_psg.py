@@ -1,18 +1,30 @@
 import sys
-from typing import NoReturn
-from PySide6 import QtWidgets
-import json
-from src.core.models import MappingSpec
-from src.core.engine import generate_preview_data, apply_template
-from src.widgets.preview_dialog import PreviewDialog
-from src.widgets.main_window import MainWindow
+import multiprocessing
+from typing import List, Optional
+
+# Sub-commands handled by the headless CLI; anything else starts the GUI
+CLI_COMMANDS = ("run", "batch")
+
+def run_gui() -> int:
+    """Start the PySide6 application."""
+    from PySide6 import QtWidgets
+    from src.widgets.main_window import MainWindow
 
-def main() -> int:
-    """Main entry point for the Excel Template Mapper application."""
     app: QtWidgets.QApplication = QtWidgets.QApplication(sys.argv)
     win: MainWindow = MainWindow()
     win.show()
     return app.exec()
 
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the Excel Template Mapper application."""
+    # Parallel saves spawn worker processes; required for frozen executables
+    multiprocessing.freeze_support()
+    args: List[str] = sys.argv[1:] if argv is None else list(argv)
+    if args and args[0] in CLI_COMMANDS:
+        # Headless mode never imports Qt
+        from src.cli import main as cli_main
+        return cli_main(args)
+    return run_gui()
+
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
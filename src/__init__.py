@@ -2,7 +2,13 @@
 
 # Only expose the most commonly used classes for convenience
 from .core.models import MappingSpec
-from .widgets.main_window import MainWindow
 
 # Import version info dynamically
-from ._version import __version__, __author__, __email__, __description__
\ No newline at end of file
+from ._version import __version__, __author__, __email__, __description__
+
+def __getattr__(name: str):
+    # MainWindow is imported on first use so headless (CLI) runs never load PySide6
+    if name == "MainWindow":
+        from .widgets.main_window import MainWindow
+        return MainWindow
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,243 @@
+"""Headless command-line interface for Excel Template Mapper.
+
+Applies an exported mapping JSON to a source workbook without importing Qt:
+
+    excel-template-mapper run --mapping spec.json --source s.xlsx --out o.xlsx [--template t.xlsx]
+    excel-template-mapper batch --mapping spec.json --sources "branches/*.xlsx" --out-dir out/
+"""
+
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List, Any, Optional
+from .core.models import MappingSpec
+from .core.engine import apply_template
+from .core.batch import BatchResult, DEFAULT_NAME_PATTERN, expand_sources, run_batch
+from .core.utils import COMPRESS_LEVELS, read_workbook_headers
+from .core.sinks import TYPED_FORMATS
+from .core.writers import OUTPUT_FORMATS, WRITE_MODES
+from .core.xlsx_reader import READERS
+from .core.progress import PHASES, RunStats
+from .core.profiling import MappingProfile
+from ._version import __version__
+
+def load_mapping(path: str) -> MappingSpec:
+    """Load a mapping exported from the GUI (MappingSpec.to_dict JSON)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data: Dict[str, Any] = json.load(f)
+    return MappingSpec.from_dict(data)
+
+def prepare_spec(
+    spec: MappingSpec,
+    source: Optional[str],
+    template: Optional[str],
+    require_source: bool = True,
+    reader: str = "openpyxl",
+) -> MappingSpec:
+    """Attach session files to a mapping and fill target headers missing from it."""
+    if source:
+        spec.source_path = source
+    if require_source and not spec.source_path:
+        raise ValueError("no source workbook given (use --source)")
+    if template:
+        spec.template_path = template
+        template_headers: Dict[str, List[str]] = read_workbook_headers(template, reader=reader)
+        for sm in spec.sheets:
+            if sm.target_sheet not in template_headers:
+                raise ValueError(f"target sheet {sm.target_sheet!r} not found in template {template}")
+            if not sm.target_headers:
+                sm.target_headers = list(template_headers[sm.target_sheet])
+    return spec
+
+class ConsoleObserver(RunStats):
+    """Records run statistics and optionally prints row progress to stderr."""
+
+    def __init__(self, show_progress: bool = False) -> None:
+        super().__init__()
+        self.show_progress: bool = show_progress
+
+    def on_rows(self, sheet: str, rows: int) -> None:
+        super().on_rows(sheet, rows)
+        if self.show_progress:
+            estimated: Optional[int] = self.sheets[sheet]["estimated_rows"]
+            total: str = f" of ~{estimated:,}" if estimated else ""
+            print(f"\r{sheet}: {rows:,}{total} rows", end="", file=sys.stderr, flush=True)
+
+    def on_sheet_finish(self, sheet: str, rows: int, timings: Dict[str, float]) -> None:
+        super().on_sheet_finish(sheet, rows, timings)
+        if self.show_progress:
+            print(f"\r{sheet}: {rows:,} rows written", file=sys.stderr)
+
+    def format_memo(self) -> str:
+        return "\n".join(
+            f"  {sheet} / {target}: {m['hit_rate']:.1%} of {m['hits'] + m['misses']:,} values from cache"
+            for sheet, stats in self.sheets.items() for target, m in stats.get("memo", {}).items()
+        )
+
+    def format_invalid(self) -> str:
+        return "\n".join(
+            f"  {sheet} / {target}: {count:,} value(s) written as null"
+            for sheet, stats in self.sheets.items() for target, count in stats.get("invalid", {}).items()
+        )
+
+    def format_timings(self) -> str:
+        total: float = sum(self.timings.values()) or 1.0
+        return "\n".join(
+            f"  {phase:<10} {self.timings[phase]:8.2f}s {100 * self.timings[phase] / total:5.1f}%" for phase in PHASES
+        )
+
+def build_parser() -> argparse.ArgumentParser:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="excel-template-mapper",
+        description="Apply Excel template mappings without the GUI.",
+    )
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="apply a saved mapping JSON to a source workbook")
+    run.add_argument("--mapping", required=True, help="mapping JSON exported from the GUI")
+    run.add_argument("--source", help="source workbook (.xlsx)")
+    run.add_argument("--template", help="template workbook; validates target sheets and fills missing headers")
+    run.add_argument("--out", required=True,
+                     help="output workbook path; with --format csv/parquet/arrow a directory (or a .zip for csv)")
+    run.add_argument("--format", choices=OUTPUT_FORMATS, default="xlsx",
+                     help="output format; csv, parquet and arrow write one file per target sheet (default: xlsx)")
+    run.add_argument("--write-mode", choices=WRITE_MODES, default="auto", help="output writer (default: auto)")
+    run.add_argument("--shared-strings", action="store_true",
+                     help="native writer: store each distinct string once instead of inline in every cell")
+    run.add_argument("--compress-level", type=int, choices=COMPRESS_LEVELS, metavar="0-9",
+                     help="output zip compression; 0 stores uncompressed for the fastest save (default: 6)")
+    run.add_argument("--workers", type=int, default=1, help="worker processes; 0 uses every core (default: 1)")
+    run.add_argument("--columnar", action="store_true", help="convert source rows in column blocks")
+    run.add_argument("--memo", type=int, default=0, metavar="N",
+                     help="cache up to N converted values per column; speeds up low-cardinality columns (default: off)")
+    run.add_argument("--reader", choices=READERS, default="openpyxl",
+                     help="workbook reader; native streams the sheet XML without openpyxl cell objects (default: openpyxl)")
+    run.add_argument("--progress", action="store_true", help="print row progress to stderr")
+    run.add_argument("--timings", action="store_true", help="print time spent per phase")
+    run.add_argument("--stats", help="write per-sheet rows and phase timings to this JSON file")
+    run.add_argument("--profile", help="time every column and stage (single process, row by row) and write "
+                                       "the report to this file; .json for JSON, otherwise text")
+    run.add_argument("-q", "--quiet", action="store_true", help="only report errors")
+
+    batch = sub.add_parser("batch", help="apply a saved mapping JSON to many source workbooks")
+    batch.add_argument("--mapping", required=True, help="mapping JSON exported from the GUI")
+    batch.add_argument("--sources", required=True, nargs="+", help="source workbooks, directories or glob patterns")
+    batch.add_argument("--template", help="template workbook; validates target sheets and fills missing headers")
+    batch.add_argument("--out-dir", required=True, help="directory for the output workbooks")
+    batch.add_argument("--name-pattern",
+                       help="output file name; {stem} is the source file name "
+                            f"(default: {DEFAULT_NAME_PATTERN}, or {{stem}}_mapped for CSV/Parquet/Arrow directories)")
+    batch.add_argument("--format", choices=OUTPUT_FORMATS, default="xlsx",
+                       help="output format; csv, parquet and arrow write one file per target sheet (default: xlsx)")
+    batch.add_argument("--write-mode", choices=WRITE_MODES, default="auto", help="output writer (default: auto)")
+    batch.add_argument("--shared-strings", action="store_true",
+                       help="native writer: store each distinct string once instead of inline in every cell")
+    batch.add_argument("--compress-level", type=int, choices=COMPRESS_LEVELS, metavar="0-9",
+                       help="output zip compression; 0 stores uncompressed for the fastest save (default: 6)")
+    batch.add_argument("--workers", type=int, default=0, help="files processed at once; 0 uses every core (default: 0)")
+    batch.add_argument("--columnar", action="store_true", help="convert source rows in column blocks")
+    batch.add_argument("--memo", type=int, default=0, metavar="N",
+                       help="cache up to N converted values per column; speeds up low-cardinality columns (default: off)")
+    batch.add_argument("--reader", choices=READERS, default="openpyxl",
+                       help="workbook reader; native streams the sheet XML without openpyxl cell objects (default: openpyxl)")
+    batch.add_argument("--report", help="write per-file results to this JSON file")
+    batch.add_argument("-q", "--quiet", action="store_true", help="only report failures")
+    return parser
+
+def cmd_run(args: argparse.Namespace) -> int:
+    started: float = time.perf_counter()
+    spec: MappingSpec = prepare_spec(load_mapping(args.mapping), args.source, args.template, reader=args.reader)
+    reporting: bool = bool(args.progress or args.timings or args.stats or args.memo)
+    observer: Optional[ConsoleObserver] = (
+        ConsoleObserver(show_progress=args.progress) if reporting or args.format in TYPED_FORMATS else None
+    )
+    if observer is not None and not reporting:
+        # Only here to collect the null counts of a typed output
+        observer.collect_timings = False
+    profile: Optional[MappingProfile] = MappingProfile() if args.profile else None
+    apply_template(
+        spec,
+        args.out,
+        write_mode=args.write_mode,
+        workers=args.workers,
+        columnar=args.columnar,
+        observer=observer,
+        profile=profile,
+        memo_size=args.memo,
+        reader=args.reader,
+        shared_strings=args.shared_strings,
+        compress_level=args.compress_level,
+        output_format=args.format,
+    )
+    if not args.quiet:
+        print(f"{args.out}: {len(spec.sheets)} sheet(s) written in {time.perf_counter() - started:.2f}s")
+    if observer is not None and observer.format_invalid():
+        print("warning: values that did not fit their column type:\n" + observer.format_invalid(), file=sys.stderr)
+    if observer is not None and args.memo and not args.quiet and observer.format_memo():
+        print(observer.format_memo())
+    if observer is not None and args.timings:
+        print(observer.format_timings())
+    if observer is not None and args.stats:
+        with open(args.stats, "w", encoding="utf-8") as f:
+            json.dump(observer.to_dict(), f, indent=2)
+    if profile is not None:
+        profile.write(args.profile)
+    return 0
+
+def cmd_batch(args: argparse.Namespace) -> int:
+    started: float = time.perf_counter()
+    spec: MappingSpec = prepare_spec(load_mapping(args.mapping), None, args.template, require_source=False, reader=args.reader)
+    sources: List[str] = expand_sources(args.sources)
+    if not sources:
+        raise ValueError("no source workbooks matched " + " ".join(args.sources))
+
+    def report(result: BatchResult) -> None:
+        if not result.ok:
+            print(f"FAIL {result.source_path}: {result.error}", file=sys.stderr)
+        elif not args.quiet:
+            print(f"ok   {result.source_path} -> {result.output_path} ({result.seconds:.2f}s)")
+        for sheet, counts in result.invalid_values.items():
+            for target, count in counts.items():
+                print(f"warning: {result.output_path}: {sheet} / {target}: {count:,} value(s) written as null "
+                      "(did not fit the column type)", file=sys.stderr)
+
+    results: List[BatchResult] = run_batch(
+        spec,
+        sources,
+        args.out_dir,
+        workers=args.workers,
+        write_mode=args.write_mode,
+        columnar=args.columnar,
+        name_pattern=args.name_pattern,
+        on_result=report,
+        memo_size=args.memo,
+        reader=args.reader,
+        shared_strings=args.shared_strings,
+        compress_level=args.compress_level,
+        output_format=args.format,
+    )
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump([r.to_dict() for r in results], f, indent=2)
+    failed: int = sum(1 for r in results if not r.ok)
+    if not args.quiet or failed:
+        print(f"{len(results) - failed} of {len(results)} file(s) written in {time.perf_counter() - started:.2f}s")
+    return 1 if failed else 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the headless CLI; returns a process exit code."""
+    args: argparse.Namespace = build_parser().parse_args(argv)
+    try:
+        if args.command == "run":
+            return cmd_run(args)
+        if args.command == "batch":
+            return cmd_batch(args)
+    except Exception as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
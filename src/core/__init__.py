@@ -2,5 +2,9 @@
 
 # Main exports for the core package
 from .models import MappingSpec, SheetMapping, ColumnMapping, TRANSFORM_CHOICES, TYPE_CHOICES
-from .engine import build_initial_spec, generate_preview_data, apply_template
-from .utils import read_workbook_headers, safe_str, is_blank, suggest_header_mapping
\ No newline at end of file
+from .engine import build_initial_spec, generate_preview_data, generate_sheet_preview, apply_template
+from .pipeline import SheetPlan, PlanCache, compile_sheet
+from .preview import PreviewSession
+from .batch import BatchResult, run_batch, expand_sources
+from .workbook import WorkbookSession, open_workbook
+from .utils import read_workbook_headers, clear_header_cache, safe_str, is_blank, suggest_header_mapping
\ No newline at end of file
@@ -0,0 +1,150 @@
+import os
+import glob
+import time
+import dataclasses
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Any, Optional, Iterable, Tuple
+from .models import MappingSpec
+from .pipeline import PlanCache
+from .engine import apply_template
+from .parallel import resolve_workers
+from .progress import RunStats
+from .sinks import TYPED_FORMATS
+
+SOURCE_EXTENSIONS: Tuple[str, ...] = (".xlsx", ".xlsm")
+
+DEFAULT_NAME_PATTERN: str = "{stem}_mapped.xlsx"
+
+# Outputs that are directories of per-sheet files are named without an extension
+FORMAT_NAME_PATTERNS: Dict[str, str] = {"csv": "{stem}_mapped", "parquet": "{stem}_mapped", "arrow": "{stem}_mapped"}
+
+@dataclass
+class BatchResult:
+    source_path: str
+    output_path: str
+    ok: bool
+    error: Optional[str] = None
+    seconds: float = 0.0
+    # Parquet/Arrow output: per sheet and target header, values written as null (see ArrowWriter)
+    invalid_values: Dict[str, Dict[str, int]] = dataclasses.field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dataclasses.asdict(self)
+
+def expand_sources(patterns: Iterable[str]) -> List[str]:
+    """Resolve files, directories and glob patterns to a sorted list of source workbooks."""
+    found: Dict[str, None] = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches: List[str] = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            matches = glob.glob(pattern, recursive=True) or [pattern]
+        for path in matches:
+            name: str = os.path.basename(path)
+            # Skip Excel lock files (~$book.xlsx) and anything that is not a workbook
+            if name.startswith("~$") or not name.lower().endswith(SOURCE_EXTENSIONS):
+                continue
+            found[os.path.abspath(path)] = None
+    return sorted(found)
+
+def output_path_for(source_path: str, out_dir: str, name_pattern: str = DEFAULT_NAME_PATTERN) -> str:
+    stem: str = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(out_dir, name_pattern.format(stem=stem))
+
+# Per-process state: the mapping is sent once per worker and its compiled plans are re-used for
+# every file whose source headers match.
+_worker_spec: Optional[MappingSpec] = None
+_worker_cache: Optional[PlanCache] = None
+_worker_options: Dict[str, Any] = {}
+
+def _init_batch_worker(spec: MappingSpec, options: Dict[str, Any]) -> None:
+    global _worker_spec, _worker_cache, _worker_options
+    _worker_spec = spec
+    _worker_cache = PlanCache()
+    _worker_options = options
+
+def _run_one(source_path: str, output_path: str) -> BatchResult:
+    started: float = time.perf_counter()
+    stats: Optional[RunStats] = None
+    if _worker_options.get("output_format") in TYPED_FORMATS:
+        stats = RunStats()
+        stats.collect_timings = False
+    try:
+        spec: MappingSpec = dataclasses.replace(_worker_spec, source_path=source_path)
+        apply_template(spec, output_path, plan_cache=_worker_cache, observer=stats, **_worker_options)
+    except Exception as e:
+        return BatchResult(source_path, output_path, False, f"{type(e).__name__}: {e}", time.perf_counter() - started)
+    invalid: Dict[str, Dict[str, int]] = (
+        {sheet: s["invalid"] for sheet, s in stats.sheets.items() if "invalid" in s} if stats is not None else {}
+    )
+    return BatchResult(source_path, output_path, True, None, time.perf_counter() - started, invalid)
+
+def run_batch(
+    spec: MappingSpec,
+    sources: Iterable[str],
+    out_dir: str,
+    workers: Optional[int] = 0,
+    write_mode: str = "auto",
+    columnar: bool = False,
+    name_pattern: Optional[str] = None,
+    on_result: Optional[Callable[[BatchResult], None]] = None,
+    memo_size: int = 0,
+    reader: str = "openpyxl",
+    shared_strings: bool = False,
+    compress_level: Optional[int] = None,
+    output_format: str = "xlsx",
+) -> List[BatchResult]:
+    """Apply one mapping to many source workbooks, one output per source.
+
+    Files are processed concurrently in a process pool (``workers`` <= 0 uses every core). A failing
+    file is reported in its BatchResult and does not stop the batch. ``on_result`` is called as each
+    file finishes; the returned list is in source order. ``name_pattern`` defaults to
+    ``{stem}_mapped.xlsx``, or ``{stem}_mapped`` for the per-sheet file formats.
+    """
+    if name_pattern is None:
+        name_pattern = FORMAT_NAME_PATTERNS.get(output_format, DEFAULT_NAME_PATTERN)
+    source_list: List[str] = list(sources)
+    jobs: List[Tuple[str, str]] = [(s, output_path_for(s, out_dir, name_pattern)) for s in source_list]
+    seen: Dict[str, str] = {}
+    for source_path, output_path in jobs:
+        if output_path in seen:
+            raise ValueError(f"{source_path} and {seen[output_path]} would both be written to {output_path}")
+        seen[output_path] = source_path
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Each file is written sequentially inside its worker; the pool provides the concurrency
+    options: Dict[str, Any] = {
+        "write_mode": write_mode, "columnar": columnar, "workers": 1, "memo_size": memo_size, "reader": reader,
+        "shared_strings": shared_strings, "compress_level": compress_level, "output_format": output_format,
+    }
+    n_workers: int = min(resolve_workers(workers), len(jobs))
+    results: Dict[str, BatchResult] = {}
+    if n_workers <= 1:
+        _init_batch_worker(spec, options)
+        for source_path, output_path in jobs:
+            results[source_path] = _run_one(source_path, output_path)
+            if on_result:
+                on_result(results[source_path])
+        return [results[s] for s, _ in jobs]
+
+    executor: ProcessPoolExecutor = ProcessPoolExecutor(
+        max_workers=n_workers, initializer=_init_batch_worker, initargs=(spec, options)
+    )
+    try:
+        futures: Dict["Future[BatchResult]", str] = {
+            executor.submit(_run_one, source_path, output_path): source_path for source_path, output_path in jobs
+        }
+        for future in as_completed(futures):
+            source_path: str = futures[future]
+            try:
+                result: BatchResult = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. out of memory)
+                result = BatchResult(source_path, output_path_for(source_path, out_dir, name_pattern), False, f"{type(e).__name__}: {e}")
+            results[source_path] = result
+            if on_result:
+                on_result(result)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return [results[s] for s, _ in jobs]
@@ -0,0 +1,129 @@
+from importlib.util import find_spec
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Sequence, Set
+from .models import ColumnMapping
+from .pipeline import SheetPlan, ColumnPlan, TRANSFORM_FUNCS, COERCERS
+
+# Columnar execution: source rows are read in blocks, each mapped column is sliced into a list and
+# converted as one batch, then rows are re-assembled for advanced rules and writing.
+# NumPy is optional; without it numeric columns use the batched Python path. It is imported on the
+# first numeric block, so runs that never convert columnar blocks do not load it.
+NUMPY_AVAILABLE: bool = find_spec("numpy") is not None
+
+_numpy: Any = None
+_numpy_loaded: bool = False
+
+def load_numpy() -> Any:
+    # The numpy module, or None when it is not installed (or fails to import)
+    global _numpy, _numpy_loaded
+    if not _numpy_loaded:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = None
+        _numpy_loaded = True
+    return _numpy
+
+BLOCK_ROWS: int = 20_000
+
+# A column block is converted once per distinct value when at most this share of values is distinct
+DISTINCT_RATIO: float = 0.5
+
+_NUMERIC_TYPES: Set[type] = {int, float}
+
+_NUMERIC_TRANSFORM_OPS: Dict[str, str] = {"to_float": "float", "to_int": "int", "date_to_iso": "noop"}
+_NUMERIC_COERCE_OPS: Dict[str, str] = {"float": "float", "number": "float", "integer": "int", "int": "int"}
+
+def numeric_ops(col: ColumnMapping, has_global_replace: bool) -> Optional[List[str]]:
+    # The column's pipeline as NumPy operations for all-numeric input, or None if any step needs strings
+    if has_global_replace or col.find_replace:
+        return None
+    ops: List[str] = []
+    for t in col.transforms or []:
+        if t not in TRANSFORM_FUNCS:
+            continue
+        op: Optional[str] = _NUMERIC_TRANSFORM_OPS.get(t)
+        if op is None:
+            return None
+        ops.append(op)
+    data_type: Optional[str] = getattr(col, "data_type", None)
+    if data_type and data_type != "general" and data_type in COERCERS:
+        if data_type not in _NUMERIC_COERCE_OPS:
+            return None
+        ops.append(_NUMERIC_COERCE_OPS[data_type])
+    return ops
+
+def _numeric_kernel(np: Any, values: List[Any], ops: List[str]) -> Optional[List[Any]]:
+    result: Any = None
+    for op in ops:
+        if op == "noop":
+            continue
+        base: Any = np.asarray(values, dtype=np.float64) if result is None else result.astype(np.float64)
+        if op == "float":
+            result = base
+        else:
+            # int() of NaN/inf raises and leaves the value unchanged; let the per-value path handle it
+            if not np.isfinite(base).all() or (np.abs(base) >= 2.0 ** 63).any():
+                return None
+            result = np.trunc(base).astype(np.int64)
+    return values if result is None else result.tolist()
+
+def _encodable(types: Set[type]) -> bool:
+    # Dictionary keys must not merge values the per-value pipeline treats differently
+    # (1 == 1.0 == True, 0.0 == -0.0)
+    return float not in types and len(types & {int, bool}) <= 1
+
+def convert_column(cp: ColumnPlan, values: List[Any], ops: Optional[List[str]]) -> List[Any]:
+    convert = cp.convert
+    if convert is None or not values:
+        return values
+    types: Set[type] = set(map(type, values))
+    np: Any = load_numpy() if ops is not None and types <= _NUMERIC_TYPES else None
+    if np is not None:
+        converted: Optional[List[Any]] = _numeric_kernel(np, values, ops)
+        if converted is not None:
+            return converted
+    if _encodable(types):
+        distinct: Dict[Any, Any] = dict.fromkeys(values)
+        if len(distinct) <= len(values) * DISTINCT_RATIO:
+            for v in distinct:
+                distinct[v] = convert(v)
+            return list(map(distinct.__getitem__, values))
+    return list(map(convert, values))
+
+class ColumnarPlan:
+    def __init__(self, plan: SheetPlan, block_rows: int = BLOCK_ROWS) -> None:
+        self.plan: SheetPlan = plan
+        self.block_rows: int = block_rows
+        has_global_replace: bool = bool(plan.global_find_replace)
+        self.numeric: List[Optional[List[str]]] = [numeric_ops(cp.column, has_global_replace) for cp in plan.columns]
+
+    def transform_block(self, block: Sequence[Sequence[Any]]) -> List[List[Any]]:
+        n: int = len(block)
+        columns: List[List[Any]] = []
+        for cp, ops in zip(self.plan.columns, self.numeric):
+            idx: Optional[int] = cp.source_idx
+            if idx is None:
+                values: List[Any] = [None] * n
+            else:
+                values = [r[idx] if idx < len(r) else None for r in block]
+            columns.append(convert_column(cp, values, ops))
+
+        out_rows: List[List[Any]] = [list(vals) for vals in zip(*columns)] if columns else [[] for _ in block]
+        if not self.plan.has_advanced and not self.plan.drop_if_all_blank:
+            return out_rows
+        finish = self.plan.finish_row
+        return [r for r in (finish(raw, out) for raw, out in zip(block, out_rows)) if r is not None]
+
+    def iter_rows(self, rows: Iterable[Sequence[Any]]) -> Iterator[List[Any]]:
+        block: List[Sequence[Any]] = []
+        for row in rows:
+            block.append(row)
+            if len(block) >= self.block_rows:
+                yield from self.transform_block(block)
+                block = []
+        if block:
+            yield from self.transform_block(block)
+
+def iter_rows_columnar(plan: SheetPlan, rows: Iterable[Sequence[Any]], block_rows: int = BLOCK_ROWS) -> Iterator[List[Any]]:
+    return ColumnarPlan(plan, block_rows).iter_rows(rows)
@@ -1,29 +1,36 @@
-from typing import Dict, List, Any, Optional, Union, Tuple
-from datetime import datetime, date, timedelta
-from openpyxl import Workbook, load_workbook
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.cell.cell import Cell, MergedCell
+import time
+import functools
+import threading
+from contextlib import closing
+from typing import Callable, Dict, List, Any, Optional, Iterator, Tuple
 from .models import MappingSpec, SheetMapping, ColumnMapping, TRANSFORM_CHOICES
-from .utils import is_blank, safe_str, read_workbook_headers, suggest_header_mapping
-
-LONG_DATE_FORMATS: Tuple[str, ...] = (
-    "%Y-%m-%d",
-    "%m/%d/%Y",
-    "%m/%d/%y",
-    "%d/%m/%Y",
-    "%m-%d-%Y",
-    "%Y%m%d",
-    "%B %d, %Y",
-    "%B %d %Y",
-    "%b %d, %Y",
-    "%b %d %Y",
-    "%d %B %Y",
-    "%d %b %Y",
+from .utils import read_workbook_headers, suggest_header_mapping
+from .pipeline import (
+    TRANSFORM_FUNCS, COERCERS, SheetPlan, PlanCache,
+    compile_sheet, compile_replacer, compile_advanced,
+)
+from .writers import OutputWriter, create_writer, resolve_write_mode
+from .workbook import PREVIEW_READER, PREVIEW_SCAN_FACTOR, CountedRows, WorkbookSession, use_session
+from .columnar import iter_rows_columnar
+from .progress import (
+    EngineObserver, ProgressFunc, as_observer, check_cancelled, new_timings, timed_rows, track_rows,
 )
+from .profiling import MappingProfile, instrument_plan
+from .parallel import CHUNK_ROWS, SheetJob, iter_rows_chunked, iter_sheet_jobs_parallel, resolve_workers
+
+def _session_headers(path: str, session: Optional[WorkbookSession]) -> Dict[str, List[str]]:
+    if session is not None and session.matches(path):
+        return session.headers
+    return read_workbook_headers(path)
 
-def build_initial_spec(template_path: str, source_path: Optional[str] = None) -> MappingSpec:
-    template_headers: Dict[str, List[str]] = read_workbook_headers(template_path)
-    source_headers: Dict[str, List[str]] = read_workbook_headers(source_path) if source_path else {}
+def build_initial_spec(
+    template_path: str,
+    source_path: Optional[str] = None,
+    template: Optional[WorkbookSession] = None,
+    source: Optional[WorkbookSession] = None,
+) -> MappingSpec:
+    template_headers: Dict[str, List[str]] = _session_headers(template_path, template)
+    source_headers: Dict[str, List[str]] = _session_headers(source_path, source) if source_path else {}
     spec: MappingSpec = MappingSpec(template_path=template_path, source_path=source_path)
 
     for sheet_name, tgt_headers in template_headers.items():
@@ -52,290 +59,346 @@ def build_initial_spec(template_path: str, source_path: Optional[str] = None) ->
 def apply_transforms(value: Any, transforms: List[str]) -> Any:
     v: Any = value
     for t in transforms:
+        func = TRANSFORM_FUNCS.get(t)
+        if func is None:
+            continue
         try:
-            if t == "trim":
-                v = safe_str(v).strip()
-            elif t == "upper":
-                v = safe_str(v).upper()
-            elif t == "lower":
-                v = safe_str(v).lower()
-            elif t == "title":
-                v = safe_str(v).title()
-            elif t == "to_string":
-                v = safe_str(v)
-            elif t == "to_int":
-                if is_blank(v):
-                    v = None
-                else:
-                    if isinstance(v, bool):
-                        v = int(v)
-                    else:
-                        v = int(float(safe_str(v)))
-            elif t == "to_float":
-                if is_blank(v):
-                    v = None
-                else:
-                    if isinstance(v, bool):
-                        v = float(int(v))
-                    else:
-                        v = float(safe_str(v).replace(",", ""))
-            elif t == "date_to_iso":
-                if isinstance(v, (datetime, date)):
-                    v = v.strftime("%Y-%m-%d")
-                else:
-                    v = v
-            elif t == "digits_only":
-                import re
-                v = re.sub(r"\D+", "", safe_str(v))
+            v = func(v)
         except Exception:
             pass
     return v
 
 def replace_values(value: Any, repl: Dict[str, str]) -> Any:
-    if not repl:
-        return value
-    sval: str = safe_str(value)
-    if sval in repl:
-        return repl[sval]
-    for k, v in repl.items():
-        if k == "":
-            continue
-        if k in sval:
-            sval = sval.replace(k, v)
-    return sval
+    replacer = compile_replacer(repl)
+    return value if replacer is None else replacer(value)
 
 def coerce_value(value: Any, data_type: Optional[str]) -> Any:
     if not data_type or data_type == "general":
         return value
+    coercer = COERCERS.get(data_type)
+    if coercer is None:
+        return value
     try:
-        if data_type in ("text", "string"):
-            return safe_str(value)
-        elif data_type in ("integer", "int"):
-            if is_blank(value):
-                return None
-            if isinstance(value, bool):
-                return int(value)
-            return int(float(safe_str(value).replace(",", "")))
-        elif data_type in ("float", "number"):
-            if is_blank(value):
-                return None
-            if isinstance(value, bool):
-                return float(int(value))
-            return float(safe_str(value).replace(",", ""))
-        elif data_type == "boolean":
-            s: str = safe_str(value).strip().lower()
-            if s in ("y", "yes", "true", "1", "t"):
-                return True
-            if s in ("n", "no", "false", "0", "f", ""):
-                return False
-            return bool(value)
-        elif data_type == "date":
-            if isinstance(value, (datetime, date)):
-                return value
-            s: str = safe_str(value).strip()
-            if s == "":
-                return None
-            for fmt in LONG_DATE_FORMATS:
-                try:
-                    return datetime.strptime(s, fmt)
-                except Exception:
-                    pass
-            try:
-                serial: float = float(s)
-                base: datetime = datetime(1899, 12, 30)
-                return base + timedelta(days=serial)
-            except Exception:
-                return value
-        else:
-            return value
+        return coercer(value)
     except Exception:
         return value
 
-def apply_advanced_to_cell(col: ColumnMapping, row_map: Dict[str, Any], current_value: Any) -> Any:
-    # If advanced_format is set, execute it as Python code
-    code: Optional[str] = getattr(col, "advanced_format", None)
-    if isinstance(code, str) and code.strip():
-        # Try to get source dict from local context if available
-        import inspect
-        frame = inspect.currentframe()
-        source_dict: Optional[Dict[str, Any]] = None
-        # Look up the call stack for 'source_dict'
-        while frame:
-            if "source_dict" in frame.f_locals:
-                source_dict = frame.f_locals["source_dict"]
-                break
-            frame = frame.f_back
-        local_vars: Dict[str, Any] = {"col": row_map, "source": source_dict, "current_value": current_value}
-        try:
-            exec(code, {}, local_vars)
-            # Expect a function named format_column(col, source)
-            if "format_column" in local_vars:
-                return local_vars["format_column"](row_map, source_dict)
-        except Exception:
-            return current_value
-    # Otherwise, use rules logic
-    rules: List[Dict[str, Any]] = getattr(col, 'advanced_rules', None) or []
-    has_else: Optional[str] = getattr(col, 'advanced_else', None)
-    if not rules and (has_else is None or has_else == ""):
+def apply_advanced_to_cell(
+    col: ColumnMapping,
+    row_map: Dict[str, Any],
+    current_value: Any,
+    source: Optional[Dict[str, Any]] = None,
+) -> Any:
+    # source maps source headers to the raw values of the current row, exposed to advanced_format code
+    advanced = compile_advanced(col)
+    if advanced is None:
         return current_value
-    ref_values: Dict[str, str] = {k: safe_str(v) for k, v in row_map.items()}
-    for r in rules:
-        ref: Optional[str] = r.get("ref") or r.get("ref_target")
-        op: str = (r.get("op") or "equals").lower()
-        match: str = r.get("match", "")
-        set_val: Any = r.get("set")
-        ref_val: str = ref_values.get(ref, "") if ref else ""
-        cond: bool = False
-        if op == "equals":
-            cond = (ref_val == match)
-        elif op == "not_equals":
-            cond = (ref_val != match)
-        elif op == "contains":
-            cond = (match in ref_val)
-        elif op in ("in", "not_in"):
-            tokens: List[str] = [t.strip() for t in safe_str(match).split(",")]
-            in_set: bool = ref_val in tokens
-            cond = in_set if op == "in" else (not in_set)
-        if cond:
-            return set_val if set_val is not None else current_value
-    if has_else is not None and has_else != "":
-        return has_else
-    return current_value
-
-def generate_preview_data(spec: MappingSpec, max_rows_per_sheet: int = 1000) -> Dict[str, Dict[str, Any]]:
-    if not spec.source_path:
-        raise ValueError("spec.source_path is not set")
-    src_wb: Workbook = load_workbook(spec.source_path, read_only=True, data_only=True)
-    preview: Dict[str, Dict[str, Any]] = {}
-    src_headers_by_sheet: Dict[str, List[str]] = read_workbook_headers(spec.source_path)
-
-    for sm in spec.sheets:
-        headers: List[str] = list(sm.target_headers)
-        rows: List[List[Any]] = []
-        truncated: bool = False
-
-        if not sm.source_sheet or sm.source_sheet not in src_wb.sheetnames:
-            preview[sm.target_sheet] = {"headers": headers, "rows": rows, "truncated": False}
-            continue
-
-        ws_src: Worksheet = src_wb[sm.source_sheet]
-        src_headers: List[str] = src_headers_by_sheet.get(sm.source_sheet, [])
-        src_index: Dict[str, int] = {h: i for i, h in enumerate(src_headers)}
+    return advanced(row_map, source, current_value)
 
-        col_map: List[Dict[str, Any]] = []
-        for col in sm.columns:
-            entry: Dict[str, Any] = {
-                "target": col.target,
-                "source_idx": src_index.get(col.source) if col.source in src_index else None,
-                "default": col.default,
-                "transforms": col.transforms,
-                "find_replace": col.find_replace,
-                "data_type": getattr(col, "data_type", None),
-                "number_format": getattr(col, "number_format", ""),
-            }
-            col_map.append(entry)
+def _estimated_sheet_rows(src: WorkbookSession, source_sheet: str) -> Optional[int]:
+    max_row: Optional[int] = src.max_row(source_sheet)
+    return None if max_row is None else max(0, max_row - 1)
 
-        count: int = 0
-        for row in ws_src.iter_rows(min_row=2, values_only=True):
-            out_row: List[Any] = []
-            for entry in col_map:
-                val: Any = None
-                if entry["source_idx"] is not None and entry["source_idx"] < len(row):
-                    val = row[entry["source_idx"]]
-                val = apply_transforms(val, entry["transforms"])
-                val = replace_values(val, spec.global_find_replace)
-                val = replace_values(val, entry["find_replace"])
-                if is_blank(val) and entry["default"] not in (None, ""):
-                    val = entry["default"]
-                val = coerce_value(val, entry.get("data_type"))
-                out_row.append(val)
-
-            row_map: Dict[str, Any] = {h: v for h, v in zip(sm.target_headers, out_row)}
-            for idx, col in enumerate(sm.columns):
-                out_row[idx] = apply_advanced_to_cell(col, row_map, out_row[idx])
-
-            if sm.drop_if_all_blank and all(is_blank(v) for v in out_row):
-                continue
+def _sheet_preview(
+    spec: MappingSpec,
+    sm: SheetMapping,
+    src: WorkbookSession,
+    max_rows_per_sheet: int,
+    observer: Optional[EngineObserver] = None,
+    cancel: Optional[threading.Event] = None,
+    timings: Optional[Dict[str, float]] = None,
+    max_scan_rows: Optional[int] = None,
+) -> Dict[str, Any]:
+    headers: List[str] = list(sm.target_headers)
+    rows: List[List[Any]] = []
+    truncated: bool = False
+    if not sm.source_sheet or sm.source_sheet not in src.sheetnames:
+        return {"headers": headers, "rows": rows, "truncated": False, "sampled_rows": 0, "total_rows": None}
 
+    plan: SheetPlan = compile_sheet(sm, src.sheet_headers(sm.source_sheet), spec.global_find_replace)
+    if timings is None:
+        timings = new_timings()
+    if max_scan_rows is None:
+        max_scan_rows = max_rows_per_sheet * PREVIEW_SCAN_FACTOR
+    # Bounded so a sheet of mostly dropped blank rows is sampled rather than read to the end
+    estimated: Optional[int] = _estimated_sheet_rows(src, sm.source_sheet)
+    sampled: CountedRows = CountedRows(src.iter_rows(sm.source_sheet, max_row=1 + max_scan_rows))
+    source_rows: Iterator[Tuple[Any, ...]] = sampled
+    if observer is not None:
+        observer.on_sheet_start(sm.target_sheet, estimated)
+        source_rows = track_rows(source_rows, sm.target_sheet, observer.on_rows, cancel, observer.every)
+    else:
+        source_rows = track_rows(source_rows, sm.target_sheet, None, cancel)
+    out_rows: Iterator[List[Any]] = (
+        timed_rows(plan, source_rows, timings) if observer is not None and observer.collect_timings
+        else plan.iter_rows(source_rows)
+    )
+    with closing(out_rows):
+        for out_row in out_rows:
             rows.append(out_row)
-            count += 1
-            if count >= max_rows_per_sheet:
+            if len(rows) >= max_rows_per_sheet:
                 truncated = True
                 break
+    if sampled.count >= max_scan_rows and (estimated is None or estimated > sampled.count):
+        truncated = True
+    if observer is not None:
+        observer.on_sheet_finish(sm.target_sheet, len(rows), timings)
+    return {
+        "headers": headers,
+        "rows": rows,
+        "truncated": truncated,
+        "sampled_rows": sampled.count,
+        "total_rows": estimated,
+    }
 
-        preview[sm.target_sheet] = {"headers": headers, "rows": rows, "truncated": truncated}
-
-    src_wb.close()
-    return preview
+def _finish_run(observer: Optional[EngineObserver], sheet_timings: List[Dict[str, float]], save: float = 0.0) -> None:
+    if observer is None:
+        return
+    totals: Dict[str, float] = new_timings()
+    for timings in sheet_timings:
+        for phase, seconds in timings.items():
+            totals[phase] += seconds
+    totals["save"] += save
+    observer.on_finish(totals)
 
-def apply_template(spec: MappingSpec, output_path: str) -> None:
+def generate_sheet_preview(
+    spec: MappingSpec,
+    sheet_name: str,
+    max_rows_per_sheet: int = 1000,
+    source: Optional[WorkbookSession] = None,
+    progress: Optional[ProgressFunc] = None,
+    cancel: Optional[threading.Event] = None,
+    observer: Optional[EngineObserver] = None,
+    max_scan_rows: Optional[int] = None,
+    reader: str = PREVIEW_READER,
+) -> Dict[str, Any]:
+    # Preview of a single target sheet; only that sheet's source rows are read
     if not spec.source_path:
         raise ValueError("spec.source_path is not set")
+    sm: Optional[SheetMapping] = next((s for s in spec.sheets if s.target_sheet == sheet_name), None)
+    if sm is None:
+        raise KeyError(f"No target sheet named {sheet_name!r}")
+    observer = as_observer(observer, progress)
+    src, owned = use_session(spec.source_path, source, reader)
+    try:
+        return _sheet_preview(spec, sm, src, max_rows_per_sheet, observer, cancel, max_scan_rows=max_scan_rows)
+    finally:
+        if owned:
+            src.close()
 
-    src_wb: Workbook = load_workbook(spec.source_path, read_only=True, data_only=True)
-
-    out_wb: Workbook = Workbook()
-    if out_wb.active and len(out_wb.worksheets) == 1 and out_wb.active.title == "Sheet":
-        out_wb.remove(out_wb.active)
-
-    src_headers_by_sheet: Dict[str, List[str]] = read_workbook_headers(spec.source_path)
+def generate_preview_data(
+    spec: MappingSpec,
+    max_rows_per_sheet: int = 1000,
+    source: Optional[WorkbookSession] = None,
+    progress: Optional[ProgressFunc] = None,
+    cancel: Optional[threading.Event] = None,
+    observer: Optional[EngineObserver] = None,
+    max_scan_rows: Optional[int] = None,
+    reader: str = PREVIEW_READER,
+) -> Dict[str, Dict[str, Any]]:
+    # At most max_scan_rows source rows (default PREVIEW_SCAN_FACTOR x max_rows_per_sheet) are read
+    # per sheet; each sheet reports sampled_rows read out of total_rows estimated from its dimension.
+    # reader picks how a source opened here is parsed (see xlsx_reader.READERS).
+    if not spec.source_path:
+        raise ValueError("spec.source_path is not set")
+    observer = as_observer(observer, progress)
+    src, owned = use_session(spec.source_path, source, reader)
+    try:
+        preview: Dict[str, Dict[str, Any]] = {}
+        sheet_timings: List[Dict[str, float]] = []
+        for sm in spec.sheets:
+            sheet_timings.append(new_timings())
+            preview[sm.target_sheet] = _sheet_preview(
+                spec, sm, src, max_rows_per_sheet, observer, cancel, sheet_timings[-1], max_scan_rows
+            )
+        _finish_run(observer, sheet_timings)
+        return preview
+    finally:
+        if owned:
+            src.close()
 
+def estimate_source_rows(spec: MappingSpec, src: WorkbookSession) -> Optional[int]:
+    total: int = 0
     for sm in spec.sheets:
-        ws_out: Worksheet = out_wb.create_sheet(title=sm.target_sheet)
-        for c_idx, header in enumerate(sm.target_headers, start=1):
-            ws_out.cell(row=1, column=c_idx, value=header)
-
-        if not sm.source_sheet or sm.source_sheet not in src_wb.sheetnames:
+        if not sm.source_sheet or sm.source_sheet not in src.sheetnames:
             continue
+        max_row: Optional[int] = src.max_row(sm.source_sheet)
+        if max_row is None:
+            return None
+        total += max(0, max_row - 1)
+    return total
 
-        ws_src: Worksheet = src_wb[sm.source_sheet]
-        src_headers: List[str] = src_headers_by_sheet.get(sm.source_sheet, [])
-        src_index: Dict[str, int] = {h: i for i, h in enumerate(src_headers)}
-
-        col_map: List[Dict[str, Any]] = []
-        for col in sm.columns:
-            entry: Dict[str, Any] = {
-                "target": col.target,
-                "source_idx": src_index.get(col.source) if col.source in src_index else None,
-                "default": col.default,
-                "transforms": col.transforms,
-                "find_replace": col.find_replace,
-                "data_type": getattr(col, "data_type", None),
-                "number_format": getattr(col, "number_format", ""),
-            }
-            col_map.append(entry)
+def iter_sheet_jobs(
+    spec: MappingSpec,
+    src: WorkbookSession,
+    workers: int = 1,
+    columnar: bool = False,
+    plan_cache: Optional[PlanCache] = None,
+    timings: Optional[Dict[str, Dict[str, float]]] = None,
+    profile: Optional[MappingProfile] = None,
+    memo_size: int = 0,
+) -> Iterator[SheetJob]:
+    # timings (target sheet -> phase seconds) switches the row-by-row path to the timed loop;
+    # profile additionally times every stage of every column (row-by-row only)
+    compile_plan = plan_cache.compile if plan_cache is not None else compile_sheet
+    for sm in spec.sheets:
+        if not sm.source_sheet or sm.source_sheet not in src.sheetnames:
+            yield sm, None, iter(())
+            continue
+        if profile is not None:
+            # Instrumented plans are never taken from or put in the plan cache
+            plan: SheetPlan = instrument_plan(
+                compile_sheet(sm, src.sheet_headers(sm.source_sheet), spec.global_find_replace), profile, sm.target_sheet
+            )
+            timings = timings if timings is not None else {}
+            yield sm, plan, timed_rows(plan, src.iter_rows(sm.source_sheet), timings.setdefault(sm.target_sheet, new_timings()))
+            continue
+        plan = compile_plan(sm, src.sheet_headers(sm.source_sheet), spec.global_find_replace, memo_size)
+        source_rows: Iterator[Tuple[Any, ...]] = src.iter_rows(sm.source_sheet)
+        max_row: Optional[int] = src.max_row(sm.source_sheet)
+        if workers > 1 and (max_row is None or max_row > CHUNK_ROWS):
+            yield sm, plan, iter_rows_chunked(plan, source_rows, workers, columnar=columnar)
+        elif columnar:
+            yield sm, plan, iter_rows_columnar(plan, source_rows)
+        elif timings is not None:
+            yield sm, plan, timed_rows(plan, source_rows, timings.setdefault(sm.target_sheet, new_timings()))
+        else:
+            yield sm, plan, plan.iter_rows(source_rows)
 
-        out_row_idx: int = 2
-        for row in ws_src.iter_rows(min_row=2, values_only=True):
-            out_row: List[Any] = []
-            for entry in col_map:
-                val: Any = None
-                if entry["source_idx"] is not None and entry["source_idx"] < len(row):
-                    val = row[entry["source_idx"]]
-                val = apply_transforms(val, entry["transforms"])
-                val = replace_values(val, spec.global_find_replace)
-                val = replace_values(val, entry["find_replace"])
-                if is_blank(val) and entry["default"] not in (None, ""):
-                    val = entry["default"]
-                val = coerce_value(val, entry.get("data_type"))
-                out_row.append(val)
+def _write_rows(
+    append: Callable[[List[Any]], None],
+    rows: Iterator[List[Any]],
+    timings: Dict[str, float],
+    pull_phase: Optional[str],
+) -> int:
+    # Times writer.append; pull_phase names the phase charged with producing rows when the row
+    # iterator is not already timing itself (columnar, chunked and per-sheet process modes)
+    clock = time.perf_counter
+    n: int = 0
+    pulled: float = 0.0
+    written: float = 0.0
+    it: Iterator[List[Any]] = iter(rows)
+    while True:
+        t0: float = clock()
+        out_row: Optional[List[Any]] = next(it, None)
+        t1: float = clock()
+        pulled += t1 - t0
+        if out_row is None:
+            break
+        append(out_row)
+        written += clock() - t1
+        n += 1
+    if pull_phase is not None:
+        timings[pull_phase] += pulled
+    timings["write"] += written
+    return n
 
-            row_map: Dict[str, Any] = {h: v for h, v in zip(sm.target_headers, out_row)}
-            for idx, col in enumerate(sm.columns):
-                out_row[idx] = apply_advanced_to_cell(col, row_map, out_row[idx])
+def apply_template(
+    spec: MappingSpec,
+    output_path: str,
+    write_mode: str = "auto",
+    source: Optional[WorkbookSession] = None,
+    workers: Optional[int] = 1,
+    columnar: bool = False,
+    plan_cache: Optional[PlanCache] = None,
+    progress: Optional[ProgressFunc] = None,
+    cancel: Optional[threading.Event] = None,
+    observer: Optional[EngineObserver] = None,
+    profile: Optional[MappingProfile] = None,
+    memo_size: int = 0,
+    reader: str = "openpyxl",
+    shared_strings: bool = False,
+    compress_level: Optional[int] = None,
+    output_format: str = "xlsx",
+) -> None:
+    # progress(sheet, rows) is called every few thousand written rows; setting cancel stops the run
+    # with Cancelled before anything is saved. observer (see progress.py) also receives sheet
+    # start/finish events and per-phase timings. profile (see profiling.py) times every stage of
+    # every column and runs the single-process row engine. memo_size > 0 caches each column's
+    # converted values per distinct raw value (see SheetPlan.memoize); hit rates go to the observer.
+    # reader="native" parses a source opened here with xlsx_reader.XlsxReader instead of openpyxl;
+    # worker processes use the same reader as the source session. write_mode="native" streams rows
+    # into the output zip with xlsx_writer.XlsxWriter; shared_strings configures it. compress_level
+    # sets the output's zip compression for every writer (0 stores, 1-9 zlib levels); the output is
+    # written to a temporary file and renamed over output_path only once it is complete.
+    # output_format "csv" writes one CSV per target sheet into the output_path directory (or a .zip
+    # of them); "parquet" / "arrow" write typed columnar files per sheet there (see sinks.py).
+    if not spec.source_path:
+        raise ValueError("spec.source_path is not set")
 
-            if sm.drop_if_all_blank and all(is_blank(v) for v in out_row):
-                continue
+    observer = as_observer(observer, progress)
+    timed: bool = profile is not None or (observer is not None and observer.collect_timings)
+    src, owned = use_session(spec.source_path, source, reader)
+    writer: Optional[OutputWriter] = None
+    try:
+        sized: bool = write_mode == "auto" and output_format == "xlsx"
+        estimated_rows: Optional[int] = estimate_source_rows(spec, src) if sized else None
+        writer = create_writer(
+            resolve_write_mode(write_mode, estimated_rows), output_path, shared_strings, compress_level, output_format
+        )
 
-            for c_idx, (v, entry) in enumerate(zip(out_row, col_map), start=1):
-                cell: Union[Cell, MergedCell] = ws_out.cell(row=out_row_idx, column=c_idx, value=v)
-                nf: str = entry.get("number_format", "")
-                if nf and isinstance(cell, Cell):
-                    try:
-                        cell.number_format = nf
-                    except Exception:
-                        pass
-            out_row_idx += 1
+        # columnar=True converts source rows in column blocks (see columnar.py) instead of row by row.
+        # workers > 1 transforms each mapped target sheet in its own process, or splits a single
+        # mapped sheet into row chunks across the pool; 0/None uses every core
+        n_workers: int = 1 if profile is not None else resolve_workers(workers)
+        if profile is not None:
+            columnar = False
+        mapped: int = sum(1 for sm in spec.sheets if sm.source_sheet and sm.source_sheet in src.sheetnames)
+        sheet_timings: Dict[str, Dict[str, float]] = {}
+        jobs: Iterator[SheetJob] = (
+            iter_sheet_jobs_parallel(spec, src, n_workers, columnar, memo_size, cancel)
+            if n_workers > 1 and mapped > 1
+            else iter_sheet_jobs(
+                spec, src, n_workers, columnar, plan_cache, sheet_timings if timed else None, profile, memo_size
+            )
+        )
+        with closing(jobs):
+            for sm, plan, rows in jobs:
+                if plan is None:
+                    writer.add_sheet(sm.target_sheet, sm.target_headers)
+                    continue
+                writer.add_sheet(sm.target_sheet, sm.target_headers, plan.number_formats, plan.data_types)
+                append: Callable[[List[Any]], None] = writer.append
+                if profile is not None:
+                    append = functools.partial(writer.append_profiled, record=profile.recorder(sm.target_sheet))
+                if observer is not None:
+                    observer.on_sheet_start(sm.target_sheet, _estimated_sheet_rows(src, sm.source_sheet))
+                tracked: Iterator[List[Any]] = (
+                    track_rows(rows, sm.target_sheet, observer.on_rows, cancel, observer.every) if observer is not None
+                    else track_rows(rows, sm.target_sheet, None, cancel)
+                )
+                if timed:
+                    # iter_sheet_jobs only registers a sheet's timings when its rows come from timed_rows
+                    self_timed: bool = sm.target_sheet in sheet_timings
+                    timings: Dict[str, float] = sheet_timings.setdefault(sm.target_sheet, new_timings())
+                    n: int = _write_rows(append, tracked, timings, None if self_timed else "transform")
+                else:
+                    n = 0
+                    for out_row in tracked:
+                        append(out_row)
+                        n += 1
+                if profile is not None:
+                    profile.sheet(sm.target_sheet).update(rows=n, phases=sheet_timings[sm.target_sheet])
+                if observer is not None:
+                    # Plans that converted rows in worker processes have no hits to report
+                    memo: Dict[str, Dict[str, Any]] = plan.memo_stats()
+                    if any(m["hits"] or m["misses"] for m in memo.values()):
+                        observer.on_memo_stats(sm.target_sheet, memo)
+                    observer.on_sheet_finish(sm.target_sheet, n, sheet_timings.get(sm.target_sheet, new_timings()))
 
-    out_wb.save(output_path)
-    src_wb.close()
\ No newline at end of file
+        check_cancelled(cancel)
+        started: float = time.perf_counter()
+        writer.save(output_path)
+        save_seconds: float = time.perf_counter() - started
+        if profile is not None:
+            profile.save_seconds = save_seconds
+        if observer is not None:
+            # Typed outputs (ArrowWriter) count values they could only write as null
+            for sheet, counts in getattr(writer, "invalid", {}).items():
+                observer.on_invalid_values(sheet, counts)
+            _finish_run(observer, list(sheet_timings.values()), save_seconds if timed else 0.0)
+    finally:
+        if writer is not None:
+            writer.close()
+        if owned:
+            src.close()
@@ -0,0 +1,179 @@
+import os
+import pickle
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from typing import Deque, Dict, List, Any, Optional, Iterable, Iterator, Sequence, Tuple
+from .models import MappingSpec, SheetMapping
+from .pipeline import SheetPlan, compile_sheet
+from .columnar import ColumnarPlan, iter_rows_columnar
+from .workbook import WorkbookSession
+from .progress import check_cancelled
+
+# Rows are spilled to disk in pickled batches so workers never hold a whole sheet in memory
+SPILL_BATCH_ROWS: int = 5000
+
+# Source rows per task when a single sheet is split across workers
+CHUNK_ROWS: int = 10_000
+
+# Seconds between cancel checks while waiting for a sheet's worker
+CANCEL_POLL_SECONDS: float = 0.1
+
+SheetJob = Tuple[SheetMapping, Optional[SheetPlan], Iterator[List[Any]]]
+
+def resolve_workers(workers: Optional[int]) -> int:
+    if workers is None or workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+def transform_sheet_to_spill(
+    source_path: str,
+    sheet: SheetMapping,
+    global_find_replace: Dict[str, str],
+    spill_path: str,
+    columnar: bool = False,
+    memo_size: int = 0,
+    reader: str = "openpyxl",
+    stop_path: Optional[str] = None,
+) -> int:
+    # The parent creates stop_path when the run is cancelled; it is checked after every spilled
+    # batch, so a cancelled sheet stops within SPILL_BATCH_ROWS rows
+    count: int = 0
+    with WorkbookSession(source_path, reader) as src:
+        plan: SheetPlan = compile_sheet(sheet, src.sheet_headers(sheet.source_sheet), global_find_replace, memo_size)
+        source_rows: Iterator[Tuple[Any, ...]] = src.iter_rows(sheet.source_sheet)
+        with open(spill_path, "wb") as f:
+            batch: List[List[Any]] = []
+            for out_row in iter_rows_columnar(plan, source_rows) if columnar else plan.iter_rows(source_rows):
+                batch.append(out_row)
+                if len(batch) >= SPILL_BATCH_ROWS:
+                    pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    count += len(batch)
+                    batch = []
+                    if stop_path is not None and os.path.exists(stop_path):
+                        return count
+            if batch:
+                pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+                count += len(batch)
+    return count
+
+def read_spill(spill_path: str) -> Iterator[List[Any]]:
+    try:
+        with open(spill_path, "rb") as f:
+            while True:
+                try:
+                    batch: List[List[Any]] = pickle.load(f)
+                except EOFError:
+                    return
+                yield from batch
+    finally:
+        try:
+            os.remove(spill_path)
+        except OSError:
+            pass
+
+def _spilled_rows(
+    future: "Future[int]", spill_path: str, cancel: Optional[threading.Event] = None
+) -> Iterator[List[Any]]:
+    # The first row waits for the whole sheet's worker; cancel is honoured while waiting
+    if cancel is not None:
+        while not wait([future], timeout=CANCEL_POLL_SECONDS).done:
+            check_cancelled(cancel)
+    future.result()
+    yield from read_spill(spill_path)
+
+def iter_sheet_jobs_parallel(
+    spec: MappingSpec,
+    src: WorkbookSession,
+    workers: int,
+    columnar: bool = False,
+    memo_size: int = 0,
+    cancel: Optional[threading.Event] = None,
+) -> Iterator[SheetJob]:
+    # Every mapped sheet is transformed in its own worker process; results are yielded in spec order
+    # so the caller can write sheet N while later sheets are still being transformed. When the
+    # caller stops early (cancel, error) the stop file tells running workers to finish their current
+    # batch and return, so shutdown does not wait for whole sheets.
+    mapped: List[int] = [
+        i for i, sm in enumerate(spec.sheets)
+        if sm.source_sheet and sm.source_sheet in src.sheetnames
+    ]
+    with tempfile.TemporaryDirectory(prefix="etm-spill-") as spill_dir:
+        stop_path: str = os.path.join(spill_dir, "stop")
+        executor: ProcessPoolExecutor = ProcessPoolExecutor(max_workers=max(1, min(workers, len(mapped))))
+        finished: bool = False
+        try:
+            futures: Dict[int, Tuple["Future[int]", str]] = {}
+            for i in mapped:
+                spill_path: str = os.path.join(spill_dir, f"sheet-{i}.pkl")
+                futures[i] = (
+                    executor.submit(
+                        transform_sheet_to_spill,
+                        spec.source_path,
+                        spec.sheets[i],
+                        spec.global_find_replace,
+                        spill_path,
+                        columnar,
+                        memo_size,
+                        src.reader,
+                        stop_path,
+                    ),
+                    spill_path,
+                )
+            for i, sm in enumerate(spec.sheets):
+                if i not in futures:
+                    yield sm, None, iter(())
+                    continue
+                plan: SheetPlan = compile_sheet(sm, src.sheet_headers(sm.source_sheet), spec.global_find_replace)
+                future, spill_path = futures[i]
+                yield sm, plan, _spilled_rows(future, spill_path, cancel)
+            finished = True
+        finally:
+            if not finished:
+                open(stop_path, "wb").close()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+_worker_plan: Any = None
+
+def _init_chunk_worker(plan: SheetPlan, columnar: bool) -> None:
+    global _worker_plan
+    _worker_plan = ColumnarPlan(plan) if columnar else plan
+
+def _transform_chunk(rows: List[Sequence[Any]]) -> List[List[Any]]:
+    return list(_worker_plan.iter_rows(rows))
+
+def _chunks(rows: Iterable[Sequence[Any]], size: int) -> Iterator[List[Sequence[Any]]]:
+    chunk: List[Sequence[Any]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_rows_chunked(
+    plan: SheetPlan,
+    rows: Iterable[Sequence[Any]],
+    workers: int,
+    chunk_rows: int = CHUNK_ROWS,
+    columnar: bool = False,
+) -> Iterator[List[Any]]:
+    # Source rows are read here and transformed in chunks by the pool; each worker rebuilds the plan
+    # once from its pickled mapping. Results come back in submission order so row order (and
+    # drop_if_all_blank, which is decided per row) is unchanged. At most two chunks per worker are
+    # in flight to keep memory bounded.
+    executor: ProcessPoolExecutor = ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_chunk_worker, initargs=(plan, columnar)
+    )
+    pending: Deque["Future[List[List[Any]]]"] = deque()
+    try:
+        for chunk in _chunks(rows, chunk_rows):
+            pending.append(executor.submit(_transform_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
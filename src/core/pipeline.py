@@ -0,0 +1,745 @@
+import re
+import functools
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Any, Optional, Callable, Iterable, Iterator, Sequence, Tuple
+from .models import SheetMapping, ColumnMapping
+from .utils import is_blank, safe_str
+
+# Compiled per-column pipeline: every column's configuration is resolved once per sheet
+# into plain callables so the row loop never re-dispatches on transform/type strings.
+
+ValueFunc = Callable[[Any], Any]
+AdvancedFunc = Callable[[Dict[str, Any], Optional[Dict[str, Any]], Any], Any]
+
+LONG_DATE_FORMATS: Tuple[str, ...] = (
+    "%Y-%m-%d",
+    "%m/%d/%Y",
+    "%m/%d/%y",
+    "%d/%m/%Y",
+    "%m-%d-%Y",
+    "%Y%m%d",
+    "%B %d, %Y",
+    "%B %d %Y",
+    "%b %d, %Y",
+    "%b %d %Y",
+    "%d %B %Y",
+    "%d %b %Y",
+)
+
+EXCEL_EPOCH: datetime = datetime(1899, 12, 30)
+
+_NON_DIGITS = re.compile(r"\D+")
+
+def _trim(v: Any) -> Any:
+    return safe_str(v).strip()
+
+def _upper(v: Any) -> Any:
+    return safe_str(v).upper()
+
+def _lower(v: Any) -> Any:
+    return safe_str(v).lower()
+
+def _title(v: Any) -> Any:
+    return safe_str(v).title()
+
+def _to_int(v: Any) -> Any:
+    if is_blank(v):
+        return None
+    if isinstance(v, bool):
+        return int(v)
+    return int(float(safe_str(v)))
+
+def _to_float(v: Any) -> Any:
+    if is_blank(v):
+        return None
+    if isinstance(v, bool):
+        return float(int(v))
+    return float(safe_str(v).replace(",", ""))
+
+def _date_to_iso(v: Any) -> Any:
+    if isinstance(v, (datetime, date)):
+        return v.strftime("%Y-%m-%d")
+    return v
+
+def _digits_only(v: Any) -> Any:
+    return _NON_DIGITS.sub("", safe_str(v))
+
+TRANSFORM_FUNCS: Dict[str, ValueFunc] = {
+    "trim": _trim,
+    "upper": _upper,
+    "lower": _lower,
+    "title": _title,
+    "to_string": safe_str,
+    "to_int": _to_int,
+    "to_float": _to_float,
+    "date_to_iso": _date_to_iso,
+    "digits_only": _digits_only,
+}
+
+def _coerce_text(value: Any) -> Any:
+    return safe_str(value)
+
+def _coerce_int(value: Any) -> Any:
+    if is_blank(value):
+        return None
+    if isinstance(value, bool):
+        return int(value)
+    return int(float(safe_str(value).replace(",", "")))
+
+def _coerce_float(value: Any) -> Any:
+    if is_blank(value):
+        return None
+    if isinstance(value, bool):
+        return float(int(value))
+    return float(safe_str(value).replace(",", ""))
+
+def _coerce_bool(value: Any) -> Any:
+    s: str = safe_str(value).strip().lower()
+    if s in ("y", "yes", "true", "1", "t"):
+        return True
+    if s in ("n", "no", "false", "0", "f", ""):
+        return False
+    return bool(value)
+
+def _format_shape(fmt: str) -> Tuple[str, ...]:
+    # The literal text between a format's directives, whitespace collapsed as strptime does. Digits
+    # and month names never contain these separators, so formats of different shapes cannot match
+    # the same string.
+    return tuple(re.sub(r"\s+", " ", part) for part in re.split(r"%.", fmt))
+
+_DATE_SHAPES: List[Tuple[str, ...]] = [_format_shape(f) for f in LONG_DATE_FORMATS]
+
+# Per format: the earlier formats that could also parse its strings (e.g. %m/%d/%Y for %d/%m/%Y)
+_DATE_GUARDS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(j for j in range(i) if _DATE_SHAPES[j] == _DATE_SHAPES[i]) for i in range(len(LONG_DATE_FORMATS))
+)
+
+# strptime's own patterns for the numeric directives (month names: anything, left to strptime)
+_DIRECTIVE_PATTERNS: Dict[str, str] = {
+    "%Y": r"(?P<Y>\d\d\d\d)",
+    "%y": r"(?P<y>\d\d)",
+    "%m": r"(?P<m>1[0-2]|0[1-9]|[1-9])",
+    "%d": r"(?P<d>3[01]|[12]\d|0[1-9]|[1-9]| [1-9])",
+    "%B": r".+?",
+    "%b": r".+?",
+}
+
+def _format_pattern(fmt: str) -> "re.Pattern[str]":
+    # Matches every string strptime(s, fmt) accepts, so a string it rejects can skip strptime and
+    # the ValueError it would raise. For all-numeric formats it is exactly strptime's pattern.
+    parts: List[str] = []
+    for token in re.split(r"(%.)", fmt):
+        if token in _DIRECTIVE_PATTERNS:
+            parts.append(_DIRECTIVE_PATTERNS[token])
+        elif token.startswith("%") and len(token) == 2:
+            parts.append(".*?")
+        else:
+            parts.append(r"\s+".join(re.escape(t) for t in re.split(r"\s+", token)))
+    return re.compile("".join(parts), re.IGNORECASE)
+
+_DATE_PATTERNS: List["re.Pattern[str]"] = [_format_pattern(f) for f in LONG_DATE_FORMATS]
+
+# Formats built from %Y/%y, %m and %d only; their matches convert without strptime
+_NUMERIC_FORMATS: List[bool] = [
+    set(re.findall(r"%.", f)) in ({"%Y", "%m", "%d"}, {"%y", "%m", "%d"}) for f in LONG_DATE_FORMATS
+]
+
+def _strptime(s: str, i: int) -> Optional[datetime]:
+    # datetime.strptime(s, LONG_DATE_FORMATS[i]), or None if it does not parse
+    match: Optional["re.Match[str]"] = _DATE_PATTERNS[i].fullmatch(s)
+    if match is None:
+        return None
+    if _NUMERIC_FORMATS[i]:
+        g: Dict[str, str] = match.groupdict()
+        if "Y" in g:
+            year: int = int(g["Y"])
+        else:
+            # strptime's two-digit year pivot
+            year = int(g["y"])
+            year += 2000 if year <= 68 else 1900
+        try:
+            return datetime(year, int(g["m"]), int(g["d"]))
+        except ValueError:
+            return None
+    try:
+        return datetime.strptime(s, LONG_DATE_FORMATS[i])
+    except Exception:
+        return None
+
+# Formats that can parse a plain integer's digits (%Y%m%d)
+_DIGIT_FORMATS: Tuple[str, ...] = tuple(
+    f for f, shape in zip(LONG_DATE_FORMATS, _DATE_SHAPES)
+    if not any(shape) and set(re.findall(r"%.", f)) <= {"%Y", "%m", "%d", "%y"}
+)
+
+# Strings parsed per date column before its most common format is tried first
+DATE_SAMPLE: int = 64
+
+def _excel_serial(s: Any, value: Any) -> Any:
+    try:
+        return EXCEL_EPOCH + timedelta(days=float(s))
+    except Exception:
+        return value
+
+def _iso_date(s: str) -> Optional[datetime]:
+    # strptime(s, "%Y-%m-%d") for zero-padded ASCII dates, without strptime
+    if len(s) == 10 and s[4] == "-" and s[7] == "-" and s.isascii():
+        y, m, d = s[:4], s[5:7], s[8:]
+        if y.isdigit() and m.isdigit() and d.isdigit():
+            try:
+                return datetime(int(y), int(m), int(d))
+            except ValueError:
+                return None
+    return None
+
+def _parse_listed(s: str) -> Tuple[int, Any]:
+    # Index of the first LONG_DATE_FORMATS entry that parses s and its result, or (-1, None)
+    for i in range(len(LONG_DATE_FORMATS)):
+        parsed: Optional[datetime] = _strptime(s, i)
+        if parsed is not None:
+            return i, parsed
+    return -1, None
+
+def _coerce_date(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value
+    kind: type = type(value)
+    if kind is float:
+        # No listed format parses a float's text; it can only be an Excel serial
+        return _excel_serial(value, value)
+    if kind is int:
+        s: str = str(value)
+        if s.isdigit():
+            for fmt in _DIGIT_FORMATS:
+                try:
+                    return datetime.strptime(s, fmt)
+                except Exception:
+                    pass
+        return _excel_serial(value, value)
+    s = safe_str(value).strip()
+    if s == "":
+        return None
+    # "%Y-%m-%d" is the first listed format, so a valid ISO date is what the format loop would return
+    parsed: Optional[datetime] = _iso_date(s)
+    if parsed is not None:
+        return parsed
+    i, parsed = _parse_listed(s)
+    if i >= 0:
+        return parsed
+    return _excel_serial(s, value)
+
+def compile_date_coercer(sample: int = DATE_SAMPLE) -> ValueFunc:
+    """A column's date coercer: same results as _coerce_date, with the column's format tried first.
+
+    The first ``sample`` parsed strings go through every listed format in order; the format that
+    parsed most of them is then tried first. A value it parses is still checked against the earlier
+    formats that could read it differently (%m/%d/%Y before %d/%m/%Y), so the result is always
+    the first listed format that parses the value.
+    """
+    counts: List[int] = [0] * len(LONG_DATE_FORMATS)
+    seen: int = 0
+    preferred: Optional[int] = None
+
+    def run(value: Any) -> Any:
+        nonlocal seen, preferred
+        if type(value) is not str or preferred == 0:
+            return _coerce_date(value)
+        s: str = value.strip()
+        if s == "":
+            return None
+        if preferred is not None:
+            parsed: Any = _strptime(s, preferred)
+            if parsed is None:
+                return _coerce_date(value)
+            for j in _DATE_GUARDS[preferred]:
+                earlier: Optional[datetime] = _strptime(s, j)
+                if earlier is not None:
+                    return earlier
+            return parsed
+        i, parsed = _parse_listed(s)
+        if i < 0:
+            return _excel_serial(s, value)
+        counts[i] += 1
+        seen += 1
+        if seen >= sample:
+            preferred = counts.index(max(counts))
+        return parsed
+    return run
+
+COERCERS: Dict[str, ValueFunc] = {
+    "text": _coerce_text,
+    "string": _coerce_text,
+    "integer": _coerce_int,
+    "int": _coerce_int,
+    "float": _coerce_float,
+    "number": _coerce_float,
+    "boolean": _coerce_bool,
+    "date": _coerce_date,
+}
+
+def compile_transforms(transforms: Sequence[str]) -> Optional[ValueFunc]:
+    funcs: List[ValueFunc] = [TRANSFORM_FUNCS[t] for t in transforms or [] if t in TRANSFORM_FUNCS]
+    if not funcs:
+        return None
+
+    def run(v: Any) -> Any:
+        for f in funcs:
+            try:
+                v = f(v)
+            except Exception:
+                pass
+        return v
+    return run
+
+# Find/replace tables with at least this many keys are scanned with one precompiled matcher
+# instead of one substring test per key
+REPLACE_MATCHER_MIN_KEYS: int = 4
+
+_TERMINAL: str = ""  # marks the end of a key in a trie node; every other entry is one character
+
+def _build_trie(keys: Sequence[str]) -> Dict[str, Any]:
+    trie: Dict[str, Any] = {}
+    for i, k in enumerate(keys):
+        node: Dict[str, Any] = trie
+        for ch in k:
+            node = node.setdefault(ch, {})
+        node[_TERMINAL] = i
+    return trie
+
+def _trie_regex(node: Dict[str, Any]) -> str:
+    # Branches share their common prefixes, so a scan costs about one step per character instead
+    # of one attempt per key; at each branch the longer keys are tried first
+    branches: List[str] = []
+    for ch in sorted(k for k in node if k != _TERMINAL):
+        child: Dict[str, Any] = node[ch]
+        text: str = ch
+        while len(child) == 1 and _TERMINAL not in child:
+            ((nxt, child),) = child.items()
+            text += nxt
+        branches.append(re.escape(text) + _trie_regex(child))
+    if not branches:
+        return ""
+    body: str = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return "(?:" + body + ")?" if _TERMINAL in node else body
+
+def _keys_in(trie: Dict[str, Any], s: str, start: int) -> Iterator[Tuple[int, int]]:
+    # (key index, end) for every key that occurs in s at position start
+    node: Optional[Dict[str, Any]] = trie
+    for end in range(start, len(s)):
+        node = node.get(s[end])
+        if node is None:
+            return
+        if _TERMINAL in node:
+            yield node[_TERMINAL], end + 1
+
+def _single_pass_safe(pairs: Sequence[Tuple[str, str]], trie: Dict[str, Any]) -> bool:
+    """True when replacing every key in one left-to-right scan gives the same result as
+    replacing the keys one after another in table order.
+
+    That holds when no two key occurrences can overlap or nest, and no replacement can create
+    (alone or together with its neighbours) an occurrence of a key that is applied after it.
+    """
+    keys: List[str] = [k for k, _ in pairs]
+    longest: int = max(len(k) for k in keys)
+    # Proper prefixes / suffixes of the keys -> position of the last key having them
+    prefixes: Dict[str, int] = {}
+    suffixes: Dict[str, int] = {}
+    last_multichar: int = -1
+    for i, k in enumerate(keys):
+        if len(k) > 1:
+            last_multichar = i
+        for n in range(1, len(k)):
+            prefixes[k[:n]] = i
+            suffixes[k[-n:]] = i
+    joined: str = "\0".join(keys)
+    starts: List[int] = []
+    offset: int = 0
+    for k in keys:
+        starts.append(offset)
+        offset += len(k) + 1
+
+    for i, (k, v) in enumerate(pairs):
+        if "\0" in k or "\0" in v:
+            return False
+        # Another key inside this one, or this key's tail starting another key
+        for a in range(len(k)):
+            for j, end in _keys_in(trie, k, a):
+                if j != i:
+                    return False
+            if a and k[a:] in prefixes:
+                return False
+        later: int = starts[i + 1] if i + 1 < len(keys) else len(joined)
+        if v == "":
+            # Removing text joins its neighbours, which may then spell a later key
+            if last_multichar > i:
+                return False
+            continue
+        # A later key inside the replacement, around it, or straddling either of its edges
+        for a in range(len(v)):
+            if any(j > i for j, _ in _keys_in(trie, v, a)):
+                return False
+        if joined.find(v, later) != -1:
+            return False
+        for n in range(1, min(len(v), longest - 1) + 1):
+            if prefixes.get(v[-n:], -1) > i or suffixes.get(v[:n], -1) > i:
+                return False
+    return True
+
+@functools.lru_cache(maxsize=64)
+def _compile_matcher(pairs: Tuple[Tuple[str, str], ...]) -> Tuple[Optional["re.Pattern[str]"], bool]:
+    # (pattern matching any key, whether one substitution pass is equivalent to the key loop)
+    keys: List[str] = [k for k, _ in pairs]
+    trie: Dict[str, Any] = _build_trie(keys)
+    try:
+        pattern: "re.Pattern[str]" = re.compile(_trie_regex(trie))
+    except (RecursionError, re.error):
+        return None, False
+    return pattern, _single_pass_safe(pairs, trie)
+
+def compile_replacer(repl: Optional[Dict[str, str]]) -> Optional[ValueFunc]:
+    if not repl:
+        return None
+    table: Dict[str, str] = dict(repl)
+    pairs: List[Tuple[str, str]] = [(k, v) for k, v in table.items() if k != ""]
+
+    def run(value: Any) -> Any:
+        sval: str = safe_str(value)
+        if sval in table:
+            return table[sval]
+        for k, v in pairs:
+            if k in sval:
+                sval = sval.replace(k, v)
+        return sval
+
+    if len(pairs) < REPLACE_MATCHER_MIN_KEYS or not all(isinstance(k, str) and isinstance(v, str) for k, v in pairs):
+        return run
+    pattern, single_pass = _compile_matcher(tuple(pairs))
+    if pattern is None:
+        return run
+    search = pattern.search
+
+    if single_pass:
+        sub = pattern.sub
+        lookup = table.__getitem__
+
+        def run_single_pass(value: Any) -> Any:
+            sval: str = safe_str(value)
+            if sval in table:
+                return table[sval]
+            if search(sval) is None:
+                return sval
+            return sub(lambda m: lookup(m.group()), sval)
+        return run_single_pass
+
+    def run_filtered(value: Any) -> Any:
+        # Values containing no key at all (the common case) skip the per-key loop
+        sval: str = safe_str(value)
+        if sval in table:
+            return table[sval]
+        if search(sval) is None:
+            return sval
+        for k, v in pairs:
+            if k in sval:
+                sval = sval.replace(k, v)
+        return sval
+    return run_filtered
+
+def compile_coercer(data_type: Optional[str]) -> Optional[ValueFunc]:
+    if not data_type or data_type == "general":
+        return None
+    coercer: Optional[ValueFunc] = COERCERS.get(data_type)
+    if coercer is None:
+        return None
+    if coercer is _coerce_date:
+        coercer = compile_date_coercer()
+
+    def run(value: Any) -> Any:
+        try:
+            return coercer(value)
+        except Exception:
+            return value
+    return run
+
+def compile_default(default: Any) -> Optional[ValueFunc]:
+    if default in (None, ""):
+        return None
+
+    def run(value: Any) -> Any:
+        return default if is_blank(value) else value
+    return run
+
+NO_RESULT: Any = object()
+
+def run_advanced_format(code: str, row_map: Dict[str, Any], source: Optional[Dict[str, Any]], current_value: Any) -> Any:
+    # Returns NO_RESULT when the code does not define format_column so callers fall through to rules
+    local_vars: Dict[str, Any] = {"col": row_map, "source": source, "current_value": current_value}
+    try:
+        exec(code, {}, local_vars)
+        # Expect a function named format_column(col, source)
+        if "format_column" in local_vars:
+            return local_vars["format_column"](row_map, source)
+    except Exception:
+        return current_value
+    return NO_RESULT
+
+def compile_rules(rules: Optional[List[Dict[str, Any]]], else_value: Optional[str]) -> Optional[AdvancedFunc]:
+    has_else: bool = else_value is not None and else_value != ""
+    if not rules and not has_else:
+        return None
+    compiled: List[Tuple[Optional[str], str, Any, Optional[List[str]], Any]] = []
+    for r in rules or []:
+        ref: Optional[str] = r.get("ref") or r.get("ref_target")
+        op: str = (r.get("op") or "equals").lower()
+        match: Any = r.get("match", "")
+        tokens: Optional[List[str]] = [t.strip() for t in safe_str(match).split(",")] if op in ("in", "not_in") else None
+        compiled.append((ref, op, match, tokens, r.get("set")))
+
+    def run(row_map: Dict[str, Any], source: Optional[Dict[str, Any]], current_value: Any) -> Any:
+        for ref, op, match, tokens, set_val in compiled:
+            ref_val: str = safe_str(row_map.get(ref)) if ref else ""
+            cond: bool = False
+            if op == "equals":
+                cond = (ref_val == match)
+            elif op == "not_equals":
+                cond = (ref_val != match)
+            elif op == "contains":
+                cond = (match in ref_val)
+            elif tokens is not None:
+                in_set: bool = ref_val in tokens
+                cond = in_set if op == "in" else (not in_set)
+            if cond:
+                return set_val if set_val is not None else current_value
+        if has_else:
+            return else_value
+        return current_value
+    return run
+
+@functools.lru_cache(maxsize=256)
+def compile_advanced_code(code: str) -> Any:
+    # Keyed on the code text (via its hash), so each distinct snippet is compiled once per process
+    return compile(code, "<advanced_format>", "exec")
+
+def load_format_column(code: str) -> Tuple[bool, Any]:
+    # Runs the snippet once in its own namespace (so top-level imports and helpers are visible to
+    # format_column) and returns (defined, format_column). Raises if the snippet cannot run up front;
+    # col, source and current_value are left undefined so code that reads them at the top level
+    # raises here and falls back to running per cell, and format_column reading current_value
+    # raises NameError and keeps the cell's value.
+    namespace: Dict[str, Any] = {}
+    exec(compile_advanced_code(code), namespace)
+    return "format_column" in namespace, namespace.get("format_column")
+
+def compile_advanced(col: ColumnMapping) -> Optional[AdvancedFunc]:
+    rules_func: Optional[AdvancedFunc] = compile_rules(getattr(col, "advanced_rules", None), getattr(col, "advanced_else", None))
+    code: Optional[str] = getattr(col, "advanced_format", None)
+    if not (isinstance(code, str) and code.strip()):
+        return rules_func
+
+    try:
+        defined, format_column = load_format_column(code)
+    except Exception:
+        # Top-level code depends on per-cell values; keep executing it for every cell
+        def run_per_cell(row_map: Dict[str, Any], source: Optional[Dict[str, Any]], current_value: Any) -> Any:
+            result: Any = run_advanced_format(code, row_map, source, current_value)
+            if result is not NO_RESULT:
+                return result
+            if rules_func is None:
+                return current_value
+            return rules_func(row_map, source, current_value)
+        return run_per_cell
+
+    if not defined:
+        return rules_func
+
+    def run(row_map: Dict[str, Any], source: Optional[Dict[str, Any]], current_value: Any) -> Any:
+        try:
+            return format_column(row_map, source)
+        except Exception:
+            return current_value
+    return run
+
+def _fuse(steps: List[ValueFunc]) -> Optional[ValueFunc]:
+    if not steps:
+        return None
+    if len(steps) == 1:
+        return steps[0]
+
+    def fused(v: Any) -> Any:
+        for step in steps:
+            v = step(v)
+        return v
+    return fused
+
+# Default number of distinct raw values remembered per column by SheetPlan.memoize
+MEMO_SIZE: int = 4096
+
+def compile_memo(convert: ValueFunc, maxsize: int) -> Tuple[ValueFunc, Any]:
+    """Wrap a column's convert function in a bounded LRU cache keyed on the raw value.
+
+    Returns (memoized function, lru_cache wrapper for cache_info). Unhashable values and float
+    zeros (0.0 and -0.0 compare equal but convert to different text) bypass the cache.
+    """
+    cached = functools.lru_cache(maxsize=maxsize, typed=True)(convert)
+
+    def run(value: Any) -> Any:
+        if type(value) is float and value == 0.0:
+            return convert(value)
+        try:
+            hash(value)
+        except TypeError:
+            return convert(value)
+        return cached(value)
+    return run, cached
+
+class ColumnPlan:
+    __slots__ = ("column", "target", "source_idx", "number_format", "steps", "convert", "advanced", "uses_source", "memo")
+
+    def __init__(self, col: ColumnMapping, source_idx: Optional[int], global_replacer: Optional[ValueFunc] = None) -> None:
+        self.column: ColumnMapping = col
+        self.target: str = col.target
+        self.source_idx: Optional[int] = source_idx
+        self.number_format: str = getattr(col, "number_format", "") or ""
+        # Named stages, in pipeline order; only configured ones are kept
+        self.steps: List[Tuple[str, ValueFunc]] = [
+            (name, step) for name, step in (
+                ("transforms", compile_transforms(col.transforms)),
+                ("global_replace", global_replacer),
+                ("find_replace", compile_replacer(col.find_replace)),
+                ("default", compile_default(col.default)),
+                ("coerce", compile_coercer(getattr(col, "data_type", None))),
+            ) if step is not None
+        ]
+        # Transforms, find/replace, default and coercion fused into one callable
+        self.convert: Optional[ValueFunc] = _fuse([step for _, step in self.steps])
+        self.advanced: Optional[AdvancedFunc] = compile_advanced(col)
+        code: Optional[str] = getattr(col, "advanced_format", None)
+        self.uses_source: bool = isinstance(code, str) and bool(code.strip())
+        # lru_cache wrapper behind convert once the sheet plan is memoized
+        self.memo: Any = None
+
+class SheetPlan:
+    def __init__(self, sheet: SheetMapping, source_headers: Sequence[str], global_find_replace: Optional[Dict[str, str]] = None) -> None:
+        self.sheet: SheetMapping = sheet
+        self.source_headers: List[str] = list(source_headers)
+        self.global_find_replace: Dict[str, str] = dict(global_find_replace or {})
+        self.headers: List[str] = list(sheet.target_headers)
+        self.drop_if_all_blank: bool = bool(sheet.drop_if_all_blank)
+        src_index: Dict[str, int] = {h: i for i, h in enumerate(self.source_headers)}
+        global_replacer: Optional[ValueFunc] = compile_replacer(self.global_find_replace)
+        self.columns: List[ColumnPlan] = [
+            ColumnPlan(col, src_index.get(col.source) if col.source in src_index else None, global_replacer)
+            for col in sheet.columns
+        ]
+        self.number_formats: List[str] = [cp.number_format for cp in self.columns]
+        self.data_types: List[Optional[str]] = [getattr(cp.column, "data_type", None) for cp in self.columns]
+        self.has_advanced: bool = any(cp.advanced is not None for cp in self.columns)
+        self.uses_source: bool = any(cp.uses_source for cp in self.columns)
+        self.memo_size: int = 0
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Compiled closures cannot be pickled; worker processes recompile from the mapping instead
+        return (compile_sheet, (self.sheet, self.source_headers, self.global_find_replace, self.memo_size))
+
+    def memoize(self, maxsize: int = MEMO_SIZE) -> "SheetPlan":
+        """Cache each column's converted value per distinct raw value (at most ``maxsize`` each).
+
+        Only pays off for low-cardinality columns (codes, statuses, names). Columns with
+        ``advanced_format`` code are left alone.
+        """
+        if maxsize <= 0 or self.memo_size:
+            return self
+        self.memo_size = maxsize
+        for cp in self.columns:
+            if cp.convert is not None and not cp.uses_source:
+                cp.convert, cp.memo = compile_memo(cp.convert, maxsize)
+        return self
+
+    def memo_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hits, misses and hit rate of every memoized column, keyed by target header."""
+        stats: Dict[str, Dict[str, Any]] = {}
+        for cp in self.columns:
+            if cp.memo is None:
+                continue
+            info = cp.memo.cache_info()
+            calls: int = info.hits + info.misses
+            stats[cp.target] = {
+                "hits": info.hits,
+                "misses": info.misses,
+                "hit_rate": info.hits / calls if calls else 0.0,
+            }
+        return stats
+
+    def transform_row(self, row: Sequence[Any]) -> Optional[List[Any]]:
+        n: int = len(row)
+        out_row: List[Any] = []
+        for cp in self.columns:
+            idx: Optional[int] = cp.source_idx
+            val: Any = row[idx] if idx is not None and idx < n else None
+            if cp.convert is not None:
+                val = cp.convert(val)
+            out_row.append(val)
+        return self.finish_row(row, out_row)
+
+    def convert_row(self, row: Sequence[Any]) -> List[Any]:
+        # transform_row without the advanced step; used where the two phases are timed separately
+        n: int = len(row)
+        out_row: List[Any] = []
+        for cp in self.columns:
+            idx: Optional[int] = cp.source_idx
+            val: Any = row[idx] if idx is not None and idx < n else None
+            out_row.append(cp.convert(val) if cp.convert is not None else val)
+        return out_row
+
+    def finish_row(self, row: Sequence[Any], out_row: List[Any]) -> Optional[List[Any]]:
+        # Advanced rules/code and blank-row dropping, applied once every column value is converted
+        if self.has_advanced:
+            row_map: Dict[str, Any] = {h: v for h, v in zip(self.headers, out_row)}
+            # advanced_format code sees the raw source row as source['Header']
+            source_map: Optional[Dict[str, Any]] = (
+                {h: v for h, v in zip(self.source_headers, row)} if self.uses_source else None
+            )
+            for i, cp in enumerate(self.columns):
+                if cp.advanced is not None:
+                    out_row[i] = cp.advanced(row_map, source_map, out_row[i])
+
+        if self.drop_if_all_blank and all(is_blank(v) for v in out_row):
+            return None
+        return out_row
+
+    def iter_rows(self, rows: Iterable[Sequence[Any]]) -> Iterator[List[Any]]:
+        transform_row = self.transform_row
+        for row in rows:
+            out_row: Optional[List[Any]] = transform_row(row)
+            if out_row is not None:
+                yield out_row
+
+def compile_sheet(
+    sheet: SheetMapping,
+    source_headers: Sequence[str],
+    global_find_replace: Optional[Dict[str, str]] = None,
+    memo_size: int = 0,
+) -> SheetPlan:
+    return SheetPlan(sheet, source_headers, global_find_replace).memoize(memo_size)
+
+class PlanCache:
+    """Re-uses compiled sheet plans when one mapping is applied to many identically laid-out sources.
+
+    Plans are keyed on the SheetMapping object and the source headers, so the mapping must not be
+    edited while the cache is in use.
+    """
+
+    def __init__(self) -> None:
+        self.plans: Dict[Tuple[int, Tuple[str, ...], Tuple[Tuple[str, str], ...], int], SheetPlan] = {}
+
+    def compile(
+        self,
+        sheet: SheetMapping,
+        source_headers: Sequence[str],
+        global_find_replace: Optional[Dict[str, str]] = None,
+        memo_size: int = 0,
+    ) -> SheetPlan:
+        key = (id(sheet), tuple(source_headers), tuple((global_find_replace or {}).items()), memo_size)
+        plan: Optional[SheetPlan] = self.plans.get(key)
+        if plan is None:
+            plan = self.plans[key] = compile_sheet(sheet, source_headers, global_find_replace, memo_size)
+        return plan
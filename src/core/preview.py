@@ -0,0 +1,261 @@
+import json
+import threading
+import dataclasses
+from typing import Dict, List, Any, Optional, Iterator, Sequence, Set, Tuple
+from .models import MappingSpec, SheetMapping, ColumnMapping
+from .utils import is_blank
+from .pipeline import SheetPlan, compile_sheet
+from .workbook import PREVIEW_READER, PREVIEW_SCAN_FACTOR, WorkbookSession, use_session
+from .progress import ProgressFunc, track_rows
+
+# Incremental preview: the raw source rows behind each preview sheet are kept together with every
+# column's converted value, so editing one column only re-runs that column (and the advanced rules
+# that read it) instead of re-reading and re-transforming the whole sheet.
+
+def _column_key(col: ColumnMapping) -> str:
+    return json.dumps(dataclasses.asdict(col), sort_keys=True, default=str)
+
+def _sheet_key(sm: SheetMapping, global_find_replace: Dict[str, str]) -> Tuple[Any, ...]:
+    # Anything outside a single column's settings invalidates the whole sheet
+    return (
+        sm.source_sheet,
+        tuple(sm.target_headers),
+        bool(sm.drop_if_all_blank),
+        len(sm.columns),
+        tuple((global_find_replace or {}).items()),
+    )
+
+def advanced_refs(col: ColumnMapping) -> Optional[Set[str]]:
+    """Target headers read by a column's advanced rules, or None if it may read any column."""
+    code: Optional[str] = getattr(col, "advanced_format", None)
+    if isinstance(code, str) and code.strip():
+        return None
+    refs: Set[str] = set()
+    for r in getattr(col, "advanced_rules", None) or []:
+        ref: Optional[str] = r.get("ref") or r.get("ref_target")
+        if ref:
+            refs.add(ref)
+    return refs
+
+class _SheetState:
+    __slots__ = ("key", "columns", "plan", "raw", "converted", "final", "exhausted", "total")
+
+    def __init__(self, key: Tuple[Any, ...], columns: List[str], plan: SheetPlan) -> None:
+        self.key: Tuple[Any, ...] = key
+        self.columns: List[str] = columns
+        self.plan: SheetPlan = plan
+        # Per source row: the raw values, each column after convert, and each column after advanced rules
+        self.raw: List[Sequence[Any]] = []
+        self.converted: List[List[Any]] = []
+        self.final: List[List[Any]] = []
+        self.exhausted: bool = False
+        # Source data rows estimated from the sheet's dimension, None when the sheet has none
+        self.total: Optional[int] = None
+
+class PreviewSession:
+    """Preview rows for a mapping, recomputed per column as the mapping is edited.
+
+    ``sheet_data`` and ``data`` return the same structure as ``generate_preview_data``. After a
+    column's settings change, call ``update_column``; ``refresh`` finds every changed column (or
+    sheet) by itself. At most ``max_scan_rows`` source rows are read per sheet before the preview
+    is shown; ``iter_remaining`` reads on from there.
+    """
+
+    def __init__(
+        self,
+        spec: MappingSpec,
+        max_rows_per_sheet: int = 1000,
+        source: Optional[WorkbookSession] = None,
+        max_scan_rows: Optional[int] = None,
+        reader: str = PREVIEW_READER,
+    ) -> None:
+        if not spec.source_path:
+            raise ValueError("spec.source_path is not set")
+        self.spec: MappingSpec = spec
+        self.max_rows: int = max_rows_per_sheet
+        self.max_scan_rows: int = max_scan_rows if max_scan_rows is not None else max_rows_per_sheet * PREVIEW_SCAN_FACTOR
+        self.source: Optional[WorkbookSession] = source
+        self.reader: str = reader
+        self.source_path: str = spec.source_path
+        self.states: Dict[str, _SheetState] = {}
+
+    def matches(self, spec: MappingSpec, source: Optional[WorkbookSession] = None) -> bool:
+        return spec is self.spec and spec.source_path == self.source_path and source is self.source
+
+    def _sheet(self, sheet_name: str) -> SheetMapping:
+        for sm in self.spec.sheets:
+            if sm.target_sheet == sheet_name:
+                return sm
+        raise KeyError(sheet_name)
+
+    def _build(
+        self,
+        sm: SheetMapping,
+        progress: Optional[ProgressFunc] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Optional[_SheetState]:
+        src, owned = use_session(self.source_path, self.source, self.reader)
+        try:
+            if not sm.source_sheet or sm.source_sheet not in src.sheetnames:
+                return None
+            plan: SheetPlan = compile_sheet(sm, src.sheet_headers(sm.source_sheet), self.spec.global_find_replace)
+            state: _SheetState = _SheetState(
+                _sheet_key(sm, self.spec.global_find_replace), [_column_key(c) for c in sm.columns], plan
+            )
+            max_row: Optional[int] = src.max_row(sm.source_sheet)
+            state.total = None if max_row is None else max(0, max_row - 1)
+            kept: int = 0
+            source_rows: Iterator[Tuple[Any, ...]] = src.iter_rows(sm.source_sheet, max_row=1 + self.max_scan_rows)
+            for row in track_rows(source_rows, sm.target_sheet, progress, cancel):
+                if kept >= self.max_rows:
+                    break
+                n: int = len(row)
+                converted: List[Any] = []
+                for cp in plan.columns:
+                    idx: Optional[int] = cp.source_idx
+                    val: Any = row[idx] if idx is not None and idx < n else None
+                    converted.append(cp.convert(val) if cp.convert is not None else val)
+                final: List[Any] = list(converted)
+                if plan.finish_row(row, final) is not None:
+                    kept += 1
+                state.raw.append(row)
+                state.converted.append(converted)
+                state.final.append(final)
+            else:
+                # Read to the end of the sheet, unless the scan stopped at max_scan_rows
+                state.exhausted = len(state.raw) < self.max_scan_rows or state.total == len(state.raw)
+            return state
+        finally:
+            if owned:
+                src.close()
+
+    def _state(
+        self,
+        sm: SheetMapping,
+        progress: Optional[ProgressFunc] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Optional[_SheetState]:
+        state: Optional[_SheetState] = self.states.get(sm.target_sheet)
+        if state is None:
+            state = self._build(sm, progress, cancel)
+            if state is not None:
+                self.states[sm.target_sheet] = state
+        return state
+
+    def update_column(self, sheet_name: str, column_index: int) -> None:
+        """Recompute one column of a built sheet after its settings changed."""
+        state: Optional[_SheetState] = self.states.get(sheet_name)
+        if state is None:
+            return
+        sm: SheetMapping = self._sheet(sheet_name)
+        if _sheet_key(sm, self.spec.global_find_replace) != state.key:
+            del self.states[sheet_name]
+            return
+        plan: SheetPlan = compile_sheet(sm, state.plan.source_headers, self.spec.global_find_replace)
+        state.plan = plan
+        state.columns[column_index] = _column_key(sm.columns[column_index])
+
+        cp = plan.columns[column_index]
+        idx: Optional[int] = cp.source_idx
+        convert = cp.convert
+        for row, converted in zip(state.raw, state.converted):
+            val: Any = row[idx] if idx is not None and idx < len(row) else None
+            converted[column_index] = convert(val) if convert is not None else val
+
+        # The changed column plus every advanced column whose rules read it
+        header: Optional[str] = plan.headers[column_index] if column_index < len(plan.headers) else None
+        dirty: List[int] = [column_index]
+        for i, other in enumerate(plan.columns):
+            if i == column_index or other.advanced is None:
+                continue
+            refs: Optional[Set[str]] = advanced_refs(other.column)
+            if refs is None or header in refs:
+                dirty.append(i)
+        self._recompute(state, dirty)
+
+    def _recompute(self, state: _SheetState, dirty: List[int]) -> None:
+        plan: SheetPlan = state.plan
+        advanced: List[int] = [i for i in dirty if plan.columns[i].advanced is not None]
+        for row, converted, final in zip(state.raw, state.converted, state.final):
+            for i in dirty:
+                final[i] = converted[i]
+            if advanced:
+                # Same inputs finish_row gives advanced rules: every converted value and the raw row
+                row_map: Dict[str, Any] = {h: v for h, v in zip(plan.headers, converted)}
+                source_map: Optional[Dict[str, Any]] = (
+                    {h: v for h, v in zip(plan.source_headers, row)} if plan.uses_source else None
+                )
+                for i in advanced:
+                    final[i] = plan.columns[i].advanced(row_map, source_map, converted[i])
+
+    def refresh(self) -> None:
+        """Bring built sheets up to date with the mapping, recomputing only what changed."""
+        by_name: Dict[str, SheetMapping] = {sm.target_sheet: sm for sm in self.spec.sheets}
+        for name in list(self.states):
+            sm: Optional[SheetMapping] = by_name.get(name)
+            state: _SheetState = self.states[name]
+            if sm is None or _sheet_key(sm, self.spec.global_find_replace) != state.key:
+                del self.states[name]
+                continue
+            for i, col in enumerate(sm.columns):
+                if _column_key(col) != state.columns[i]:
+                    self.update_column(name, i)
+
+    def _kept_rows(self, state: _SheetState) -> List[List[Any]]:
+        drop: bool = state.plan.drop_if_all_blank
+        rows: List[List[Any]] = []
+        for final in state.final:
+            if drop and all(is_blank(v) for v in final):
+                continue
+            rows.append(list(final))
+            if len(rows) >= self.max_rows:
+                break
+        return rows
+
+    def sheet_data(
+        self,
+        sheet_name: str,
+        progress: Optional[ProgressFunc] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Dict[str, Any]:
+        sm: SheetMapping = self._sheet(sheet_name)
+        headers: List[str] = list(sm.target_headers)
+        state: Optional[_SheetState] = self._state(sm, progress, cancel)
+        if state is None:
+            return {"headers": headers, "rows": [], "truncated": False, "sampled_rows": 0, "total_rows": None}
+        rows: List[List[Any]] = self._kept_rows(state)
+        if len(rows) < self.max_rows and not state.exhausted and len(state.raw) < self.max_scan_rows:
+            # Rows that used to be dropped as blank now count; read further into the source
+            del self.states[sheet_name]
+            state = self._state(sm, progress, cancel)
+            rows = self._kept_rows(state)
+        return {
+            "headers": headers,
+            "rows": rows,
+            "truncated": len(rows) >= self.max_rows or not state.exhausted,
+            "sampled_rows": len(state.raw),
+            "total_rows": state.total,
+        }
+
+    def iter_remaining(self, sheet_name: str) -> Iterator[List[Any]]:
+        """Rows after the first ``max_rows_per_sheet``, read from the source only as they are consumed."""
+        sm: SheetMapping = self._sheet(sheet_name)
+        state: Optional[_SheetState] = self._state(sm)
+        if state is None:
+            return
+        drop: bool = state.plan.drop_if_all_blank
+        kept: List[List[Any]] = [list(f) for f in state.final if not (drop and all(is_blank(v) for v in f))]
+        yield from kept[self.max_rows:]
+        if state.exhausted:
+            return
+        plan: SheetPlan = state.plan
+        start: int = 2 + len(state.raw)
+        src, owned = use_session(self.source_path, self.source, self.reader)
+        try:
+            yield from plan.iter_rows(src.iter_rows(sm.source_sheet, min_row=start))
+        finally:
+            if owned:
+                src.close()
+
+    def data(self) -> Dict[str, Dict[str, Any]]:
+        return {sm.target_sheet: self.sheet_data(sm.target_sheet) for sm in self.spec.sheets}
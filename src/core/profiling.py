@@ -0,0 +1,126 @@
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .pipeline import SheetPlan, ValueFunc, AdvancedFunc
+from .progress import new_timings
+from .writers import StageRecorder
+
+# Per-column stages, in the order a value passes through them
+STAGES: Tuple[str, ...] = (
+    "transforms", "global_replace", "find_replace", "default", "coerce", "advanced", "write", "number_format",
+)
+
+class MappingProfile:
+    """Call counts and time per column and stage for one profiled apply_template run.
+
+    Pass an instance as ``apply_template(..., profile=...)``; the run then uses the single-process
+    row engine so every stage of every column can be attributed.
+    """
+
+    def __init__(self) -> None:
+        # (sheet, column index) -> column info and stage -> [calls, seconds]
+        self.columns: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self.sheets: Dict[str, Dict[str, Any]] = {}
+        self.save_seconds: float = 0.0
+
+    def column(self, sheet: str, index: int, target: str = "", source: Optional[str] = None) -> Dict[str, List[float]]:
+        entry: Optional[Dict[str, Any]] = self.columns.get((sheet, index))
+        if entry is None:
+            entry = self.columns[(sheet, index)] = {"target": target, "source": source, "stages": {}}
+        return entry["stages"]
+
+    def stage(self, sheet: str, index: int, stage: str) -> List[float]:
+        return self.column(sheet, index).setdefault(stage, [0, 0.0])
+
+    def sheet(self, sheet: str) -> Dict[str, Any]:
+        return self.sheets.setdefault(sheet, {"rows": 0, "phases": new_timings()})
+
+    def recorder(self, sheet: str) -> StageRecorder:
+        def record(index: int, stage: str, seconds: float) -> None:
+            acc: List[float] = self.stage(sheet, index, stage)
+            acc[0] += 1
+            acc[1] += seconds
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        sheets: Dict[str, Any] = {name: dict(info, columns=[]) for name, info in self.sheets.items()}
+        for (sheet, index), entry in sorted(self.columns.items(), key=lambda kv: (kv[0][0], kv[0][1])):
+            stages: Dict[str, Dict[str, float]] = {}
+            for name in STAGES:
+                if name in entry["stages"]:
+                    calls, seconds = entry["stages"][name]
+                    stages[name] = {"calls": int(calls), "seconds": seconds}
+            sheets.setdefault(sheet, {"rows": 0, "phases": new_timings(), "columns": []})["columns"].append({
+                "index": index,
+                "target": entry["target"],
+                "source": entry["source"],
+                "seconds": sum(s["seconds"] for s in stages.values()),
+                "stages": stages,
+            })
+        return {"save_seconds": self.save_seconds, "sheets": sheets}
+
+    def format_text(self, top: Optional[int] = None) -> str:
+        """Columns sorted by total time, slowest first, with their per-stage breakdown."""
+        report: Dict[str, Any] = self.to_dict()
+        columns: List[Tuple[str, Dict[str, Any]]] = [
+            (sheet, col) for sheet, info in report["sheets"].items() for col in info["columns"]
+        ]
+        columns.sort(key=lambda item: item[1]["seconds"], reverse=True)
+        if top is not None:
+            columns = columns[:top]
+        lines: List[str] = []
+        for sheet, info in report["sheets"].items():
+            phases: str = ", ".join(f"{k} {v:.3f}s" for k, v in info["phases"].items() if v)
+            lines.append(f"{sheet}: {info['rows']:,} rows ({phases})")
+        lines.append(f"save: {report['save_seconds']:.3f}s")
+        lines.append("")
+        lines.append(f"{'seconds':>9}  {'sheet / column':<40} stages")
+        for sheet, col in columns:
+            stages: str = ", ".join(
+                f"{name} {s['seconds']:.3f}s/{s['calls']:,}" for name, s in col["stages"].items()
+            )
+            lines.append(f"{col['seconds']:9.3f}  {(sheet + ' / ' + col['target'])[:40]:<40} {stages}")
+        return "\n".join(lines)
+
+    def write(self, path: str) -> None:
+        """Write the report as JSON when path ends in .json, otherwise as text."""
+        with open(path, "w", encoding="utf-8") as f:
+            if path.lower().endswith(".json"):
+                json.dump(self.to_dict(), f, indent=2)
+            else:
+                f.write(self.format_text() + "\n")
+
+def _timed_steps(steps: List[Tuple[str, ValueFunc]], stats: Dict[str, List[float]]) -> ValueFunc:
+    clock: Callable[[], float] = time.perf_counter
+    timed: List[Tuple[ValueFunc, List[float]]] = [(step, stats.setdefault(name, [0, 0.0])) for name, step in steps]
+
+    def run(v: Any) -> Any:
+        for step, acc in timed:
+            t0: float = clock()
+            v = step(v)
+            acc[1] += clock() - t0
+            acc[0] += 1
+        return v
+    return run
+
+def _timed_advanced(advanced: AdvancedFunc, acc: List[float]) -> AdvancedFunc:
+    clock: Callable[[], float] = time.perf_counter
+
+    def run(row_map: Dict[str, Any], source: Optional[Dict[str, Any]], current_value: Any) -> Any:
+        t0: float = clock()
+        try:
+            return advanced(row_map, source, current_value)
+        finally:
+            acc[1] += clock() - t0
+            acc[0] += 1
+    return run
+
+def instrument_plan(plan: SheetPlan, profile: MappingProfile, sheet: str) -> SheetPlan:
+    """Wrap every stage of a freshly compiled plan with timing; the plan must not be shared."""
+    for i, cp in enumerate(plan.columns):
+        stats: Dict[str, List[float]] = profile.column(sheet, i, cp.target, cp.column.source)
+        if cp.steps:
+            cp.convert = _timed_steps(cp.steps, stats)
+        if cp.advanced is not None:
+            cp.advanced = _timed_advanced(cp.advanced, stats.setdefault("advanced", [0, 0.0]))
+    return plan
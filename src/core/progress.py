@@ -0,0 +1,161 @@
+import time
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+# Rows between progress reports and cancellation checks in the engine's row loops
+PROGRESS_EVERY: int = 1000
+
+# Called with (target sheet, rows done in that sheet)
+ProgressFunc = Callable[[str, int], None]
+
+T = TypeVar("T")
+
+class Cancelled(Exception):
+    """Raised from an engine row loop once its cancel event is set."""
+
+def check_cancelled(cancel: Optional[threading.Event]) -> None:
+    if cancel is not None and cancel.is_set():
+        raise Cancelled("Cancelled")
+
+def track_rows(
+    rows: Iterable[T],
+    sheet: str,
+    progress: Optional[ProgressFunc] = None,
+    cancel: Optional[threading.Event] = None,
+    every: int = PROGRESS_EVERY,
+) -> Iterator[T]:
+    """Pass rows through, reporting progress and checking for cancellation every ``every`` rows."""
+    if progress is None and cancel is None:
+        return iter(rows)
+    return _tracked(rows, sheet, progress, cancel, every)
+
+def _tracked(
+    rows: Iterable[T],
+    sheet: str,
+    progress: Optional[ProgressFunc],
+    cancel: Optional[threading.Event],
+    every: int,
+) -> Iterator[T]:
+    check_cancelled(cancel)
+    n: int = 0
+    for row in rows:
+        yield row
+        n += 1
+        if n % every == 0:
+            check_cancelled(cancel)
+            if progress is not None:
+                progress(sheet, n)
+    if progress is not None:
+        progress(sheet, n)
+
+# Phases timed for observers: reading source rows, per-column conversion, advanced rules/code,
+# writing cells and saving the output file
+PHASES: Tuple[str, ...] = ("read", "transform", "advanced", "write", "save")
+
+def new_timings() -> Dict[str, float]:
+    return dict.fromkeys(PHASES, 0.0)
+
+class EngineObserver:
+    """Receives progress and timing events from preview and apply_template runs.
+
+    Every method is a no-op; override the ones you need. ``on_rows`` is called every ``every``
+    rows. Timings are seconds per phase (see PHASES); with ``collect_timings = False`` the engine
+    skips the per-row clock reads and reports zeros.
+    """
+
+    every: int = PROGRESS_EVERY
+    collect_timings: bool = True
+
+    def on_sheet_start(self, sheet: str, estimated_rows: Optional[int]) -> None:
+        pass
+
+    def on_rows(self, sheet: str, rows: int) -> None:
+        pass
+
+    def on_memo_stats(self, sheet: str, columns: Dict[str, Dict[str, Any]]) -> None:
+        # Per memoized column (target header): hits, misses, hit_rate; only with memo_size > 0
+        pass
+
+    def on_sheet_finish(self, sheet: str, rows: int, timings: Dict[str, float]) -> None:
+        pass
+
+    def on_invalid_values(self, sheet: str, columns: Dict[str, int]) -> None:
+        # Per target header: values written as null because they did not fit the column type
+        # (Parquet/Arrow output only); called after the output is saved
+        pass
+
+    def on_finish(self, timings: Dict[str, float]) -> None:
+        pass
+
+class ProgressObserver(EngineObserver):
+    """Adapts a plain progress(sheet, rows) callback to the observer interface."""
+
+    collect_timings = False
+
+    def __init__(self, progress: ProgressFunc) -> None:
+        self.progress: ProgressFunc = progress
+
+    def on_rows(self, sheet: str, rows: int) -> None:
+        self.progress(sheet, rows)
+
+class RunStats(EngineObserver):
+    """Records every event; used by the CLI's --timings report and by tests."""
+
+    def __init__(self) -> None:
+        self.sheets: Dict[str, Dict[str, Any]] = {}
+        self.timings: Dict[str, float] = new_timings()
+
+    def on_sheet_start(self, sheet: str, estimated_rows: Optional[int]) -> None:
+        self.sheets[sheet] = {"estimated_rows": estimated_rows, "rows": 0, "timings": new_timings()}
+
+    def on_rows(self, sheet: str, rows: int) -> None:
+        self.sheets[sheet]["rows"] = rows
+
+    def on_memo_stats(self, sheet: str, columns: Dict[str, Dict[str, Any]]) -> None:
+        self.sheets[sheet]["memo"] = columns
+
+    def on_sheet_finish(self, sheet: str, rows: int, timings: Dict[str, float]) -> None:
+        self.sheets[sheet].update(rows=rows, timings=dict(timings))
+
+    def on_invalid_values(self, sheet: str, columns: Dict[str, int]) -> None:
+        self.sheets.setdefault(sheet, {})["invalid"] = dict(columns)
+
+    def on_finish(self, timings: Dict[str, float]) -> None:
+        self.timings = dict(timings)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"timings": self.timings, "sheets": self.sheets}
+
+def as_observer(observer: Optional[EngineObserver], progress: Optional[ProgressFunc]) -> Optional[EngineObserver]:
+    if observer is not None or progress is None:
+        return observer
+    return ProgressObserver(progress)
+
+def timed_rows(plan: Any, source_rows: Iterable[Sequence[Any]], timings: Dict[str, float]) -> Iterator[List[Any]]:
+    """SheetPlan.iter_rows with the read, transform and advanced phases timed separately."""
+    clock: Callable[[], float] = time.perf_counter
+    convert_row = plan.convert_row
+    finish_row = plan.finish_row
+    it: Iterator[Sequence[Any]] = iter(source_rows)
+    read: float = 0.0
+    transform: float = 0.0
+    advanced: float = 0.0
+    try:
+        while True:
+            t0: float = clock()
+            row: Optional[Sequence[Any]] = next(it, None)
+            t1: float = clock()
+            read += t1 - t0
+            if row is None:
+                break
+            out_row: Optional[List[Any]] = convert_row(row)
+            t2: float = clock()
+            out_row = finish_row(row, out_row)
+            advanced += clock() - t2
+            transform += t2 - t1
+            if out_row is not None:
+                yield out_row
+    finally:
+        timings["read"] += read
+        timings["transform"] += transform
+        timings["advanced"] += advanced
@@ -0,0 +1,314 @@
+import io
+import os
+import re
+import csv
+import time
+import zipfile
+from importlib.util import find_spec
+from datetime import date, datetime, time as dt_time
+from typing import Any, Callable, Dict, IO, List, Optional, Sequence, Tuple
+from .utils import remove_output, replace_output, safe_str, temp_output_path, zip_compression
+
+# Non-workbook outputs with the same add_sheet/append/save interface as the workbook writers, so
+# they are fed by the same row engine. Each target sheet becomes its own file.
+# pyarrow is optional; without it only CSV output is available. It is imported when the first
+# Parquet/Arrow writer is created.
+PYARROW_AVAILABLE: bool = find_spec("pyarrow") is not None
+
+# Output formats whose columns are typed; values that do not fit are reported (see ArrowWriter)
+TYPED_FORMATS: Tuple[str, ...] = ("parquet", "arrow")
+
+pa: Any = None
+pq: Any = None
+
+def load_pyarrow() -> None:
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("Parquet and Arrow output need pyarrow (pip install .[arrow])") from e
+        pa, pq = pyarrow, pyarrow.parquet
+
+# Receives (column index, stage, seconds) from append_profiled
+StageRecorder = Callable[[int, str, float], None]
+
+# Rows buffered per Parquet row group / Arrow record batch
+BATCH_ROWS: int = 65_536
+
+# Characters that cannot appear in file names on common file systems
+_UNSAFE_NAME = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+def sheet_file_name(title: str, extension: str, taken: List[str]) -> str:
+    # A file name for a target sheet, unique (ignoring case) among the names already taken
+    stem: str = _UNSAFE_NAME.sub("_", title or "Sheet").strip(" .") or "Sheet"
+    name: str = stem + extension
+    n: int = 1
+    lowered: List[str] = [t.lower() for t in taken]
+    while name.lower() in lowered:
+        name = f"{stem}_{n}{extension}"
+        n += 1
+    taken.append(name)
+    return name
+
+class CsvWriter:
+    """Streams each target sheet to a CSV file: one per sheet in a directory, or inside a .zip.
+
+    ``output_path`` ending in ``.zip`` writes a single archive with one ``<sheet>.csv`` entry per
+    sheet (``compress_level`` as for workbooks); any other path is a directory that receives the
+    files. Values are written as text (None as an empty field); number formats do not apply.
+    """
+
+    def __init__(self, output_path: str, compress_level: Optional[int] = None, encoding: str = "utf-8") -> None:
+        compression, level = zip_compression(compress_level)
+        self.output_path: str = output_path
+        self.encoding: str = encoding
+        self.archive: Optional[zipfile.ZipFile] = None
+        self.temp_path: Optional[str] = None
+        if output_path.lower().endswith(".zip"):
+            self.temp_path = temp_output_path(output_path)
+            self.archive = zipfile.ZipFile(self.temp_path, "w", compression, allowZip64=True, compresslevel=level)
+        else:
+            os.makedirs(output_path, exist_ok=True)
+        self.names: List[str] = []
+        # (temporary path, final path) of every sheet file written to the directory
+        self.files: List[Tuple[str, str]] = []
+        self.stream: Optional[IO[str]] = None
+        self.rows: Any = None
+        self.width: int = 0
+
+    def add_sheet(
+        self,
+        title: str,
+        headers: Sequence[str],
+        number_formats: Sequence[str] = (),
+        data_types: Sequence[Optional[str]] = (),
+    ) -> None:
+        self._end_sheet()
+        name: str = sheet_file_name(title, ".csv", self.names)
+        if self.archive is not None:
+            raw: IO[bytes] = self.archive.open(name, "w", force_zip64=True)
+            self.stream = io.TextIOWrapper(raw, encoding=self.encoding, newline="")
+        else:
+            final: str = os.path.join(self.output_path, name)
+            temp: str = temp_output_path(final)
+            self.files.append((temp, final))
+            self.stream = open(temp, "w", encoding=self.encoding, newline="")
+        self.rows = csv.writer(self.stream)
+        self.rows.writerow(headers)
+        self.width = len(number_formats)
+
+    def _end_sheet(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def append(self, row: Sequence[Any]) -> None:
+        self.rows.writerow(row[:self.width])
+
+    def append_profiled(self, row: Sequence[Any], record: StageRecorder) -> None:
+        # append() timed as a whole and split evenly across the row's columns
+        clock: Callable[[], float] = time.perf_counter
+        values: Sequence[Any] = row[:self.width]
+        t0: float = clock()
+        self.rows.writerow(values)
+        n: int = len(values)
+        share: float = (clock() - t0) / n if n else 0.0
+        for idx in range(n):
+            record(idx, "write", share)
+
+    def save(self, output_path: str) -> None:
+        self._end_sheet()
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+            replace_output(self.temp_path, output_path)
+            return
+        for temp, final in self.files:
+            replace_output(temp, final)
+        self.files = []
+
+    def close(self) -> None:
+        self._end_sheet()
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+        if self.temp_path is not None:
+            remove_output(self.temp_path)
+        for temp, _ in self.files:
+            remove_output(temp)
+
+def _to_string(value: Any) -> Any:
+    return value if type(value) is str else safe_str(value)
+
+def _to_int(value: Any) -> Any:
+    if type(value) is float and value.is_integer():
+        value = int(value)
+    if not isinstance(value, int) or not -2 ** 63 <= value < 2 ** 63:
+        raise TypeError(value)
+    return int(value)
+
+def _to_float(value: Any) -> Any:
+    if not isinstance(value, (int, float)):
+        raise TypeError(value)
+    return float(value)
+
+def _to_bool(value: Any) -> Any:
+    if type(value) is not bool:
+        raise TypeError(value)
+    return value
+
+def _to_timestamp(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, dt_time())
+    raise TypeError(value)
+
+# data_type -> (Arrow type name, value converter); other types (general, unset) are text.
+# Keys follow pipeline.COERCERS
+ARROW_COLUMN_TYPES: Dict[str, Tuple[str, Callable[[Any], Any]]] = {
+    "text": ("string", _to_string),
+    "string": ("string", _to_string),
+    "integer": ("int64", _to_int),
+    "int": ("int64", _to_int),
+    "float": ("float64", _to_float),
+    "number": ("float64", _to_float),
+    "boolean": ("bool", _to_bool),
+    "date": ("timestamp", _to_timestamp),
+}
+
+def convert_column(values: List[Any], convert: Callable[[Any], Any]) -> Tuple[List[Any], int]:
+    # (converted values, number of values that did not fit and became None); None stays None
+    converted: List[Any] = []
+    invalid: int = 0
+    for value in values:
+        if value is not None:
+            try:
+                value = convert(value)
+            except (TypeError, ValueError):
+                value = None
+                invalid += 1
+        converted.append(value)
+    return converted, invalid
+
+def _arrow_type(name: str) -> Any:
+    if name == "timestamp":
+        return pa.timestamp("us")
+    return {"string": pa.string(), "int64": pa.int64(), "float64": pa.float64(), "bool": pa.bool_()}[name]
+
+class ArrowWriter:
+    """Streams each target sheet to a Parquet or Arrow IPC file in the ``output_path`` directory.
+
+    Column types come from each ``ColumnMapping.data_type`` (integer, float, boolean, date as
+    timestamp, anything else as text). A value that does not fit its column's type, such as text
+    left by a failed integer coercion, is written as null and counted in ``invalid``;
+    apply_template reports the counts to its observer (``on_invalid_values``) after saving.
+    ``compress_level`` 0 writes uncompressed files; 1-9 use gzip (Parquet) or zstd (Arrow) at that
+    level; None keeps pyarrow's default (snappy Parquet, uncompressed Arrow).
+    """
+
+    def __init__(self, output_path: str, file_format: str = "parquet", compress_level: Optional[int] = None) -> None:
+        load_pyarrow()
+        if file_format not in ("parquet", "arrow"):
+            raise ValueError(f"Unknown columnar format: {file_format!r} (expected parquet or arrow)")
+        zip_compression(compress_level)
+        self.output_path: str = output_path
+        self.file_format: str = file_format
+        self.compress_level: Optional[int] = compress_level
+        os.makedirs(output_path, exist_ok=True)
+        self.names: List[str] = []
+        self.files: List[Tuple[str, str]] = []
+        self.sink: Any = None
+        self.schema: Any = None
+        self.converters: List[Callable[[Any], Any]] = []
+        self.buffer: List[Sequence[Any]] = []
+        self.title: str = ""
+        self.headers: List[str] = []
+        # Per sheet and column: values written as null because they did not fit the column type
+        self.invalid: Dict[str, Dict[str, int]] = {}
+
+    def _open_sink(self, path: str) -> Any:
+        level: Optional[int] = self.compress_level
+        if self.file_format == "parquet":
+            if level is None:
+                return pq.ParquetWriter(path, self.schema)
+            if level == 0:
+                return pq.ParquetWriter(path, self.schema, compression="none")
+            return pq.ParquetWriter(path, self.schema, compression="gzip", compression_level=level)
+        options: Any = pa.ipc.IpcWriteOptions(compression=pa.Codec("zstd", level) if level else None)
+        return pa.ipc.new_file(path, self.schema, options=options)
+
+    def add_sheet(
+        self,
+        title: str,
+        headers: Sequence[str],
+        number_formats: Sequence[str] = (),
+        data_types: Sequence[Optional[str]] = (),
+    ) -> None:
+        self._end_sheet()
+        self.title = title
+        self.headers = [safe_str(h) for h in headers]
+        types: List[Tuple[str, Callable[[Any], Any]]] = [
+            ARROW_COLUMN_TYPES.get(data_types[i] if i < len(data_types) else None, ("string", _to_string))
+            for i in range(len(self.headers))
+        ]
+        self.schema = pa.schema([(h, _arrow_type(name)) for h, (name, _) in zip(self.headers, types)])
+        self.converters = [convert for _, convert in types]
+        name: str = sheet_file_name(title, "." + self.file_format, self.names)
+        final: str = os.path.join(self.output_path, name)
+        temp: str = temp_output_path(final)
+        self.files.append((temp, final))
+        self.sink = self._open_sink(temp)
+
+    def _column(self, idx: int) -> Any:
+        values, invalid = convert_column([row[idx] if idx < len(row) else None for row in self.buffer], self.converters[idx])
+        if invalid:
+            counts: Dict[str, int] = self.invalid.setdefault(self.title, {})
+            header: str = self.headers[idx]
+            counts[header] = counts.get(header, 0) + invalid
+        return pa.array(values, type=self.schema.field(idx).type)
+
+    def _flush(self) -> None:
+        if not self.buffer:
+            return
+        columns: List[Any] = [self._column(idx) for idx in range(len(self.headers))]
+        self.sink.write_batch(pa.RecordBatch.from_arrays(columns, schema=self.schema))
+        self.buffer = []
+
+    def _end_sheet(self) -> None:
+        if self.sink is None:
+            return
+        self._flush()
+        self.sink.close()
+        self.sink = None
+
+    def append(self, row: Sequence[Any]) -> None:
+        self.buffer.append(row)
+        if len(self.buffer) >= BATCH_ROWS:
+            self._flush()
+
+    def append_profiled(self, row: Sequence[Any], record: StageRecorder) -> None:
+        # Rows are converted a batch at a time, so the time of a flush is split evenly across the
+        # columns of the row that triggered it
+        clock: Callable[[], float] = time.perf_counter
+        t0: float = clock()
+        self.append(row)
+        n: int = len(self.headers)
+        share: float = (clock() - t0) / n if n else 0.0
+        for idx in range(n):
+            record(idx, "write", share)
+
+    def save(self, output_path: str) -> None:
+        self._end_sheet()
+        for temp, final in self.files:
+            replace_output(temp, final)
+        self.files = []
+
+    def close(self) -> None:
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+        for temp, _ in self.files:
+            remove_output(temp)
@@ -1,7 +1,12 @@
+import os
+import json
+import shutil
 import difflib
+import zipfile
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional, Tuple
-from openpyxl import load_workbook
-from openpyxl.workbook.workbook import Workbook
+from .xlsx_reader import open_reader
 
 def is_blank(value: Any) -> bool:
     if value is None:
@@ -16,20 +21,133 @@ def safe_str(value: Any) -> str:
     except Exception:
         return ""
 
-def read_workbook_headers(path: str) -> Dict[str, List[str]]:
-    wb: Workbook = load_workbook(path, read_only=True, data_only=True)
+def file_signature(path: str) -> Tuple[str, int, int]:
+    st: os.stat_result = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+def worksheet_headers(ws: Any) -> List[str]:
+    headers: List[str] = []
+    first_row: Optional[Tuple[Any, ...]] = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
+    if first_row:
+        headers = [safe_str(h).strip() for h in first_row]
+        while headers and headers[-1] == "":
+            headers.pop()
+    return headers
+
+# Headers keyed by (absolute path, size, mtime_ns) so a changed file is never served stale
+HEADER_CACHE_SIZE: int = 32
+HeaderKey = Tuple[str, int, int]
+_header_cache: "OrderedDict[HeaderKey, Dict[str, List[str]]]" = OrderedDict()
+_header_cache_lock: threading.Lock = threading.Lock()
+
+def _copy_headers(headers: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    return {sheet: list(h) for sheet, h in headers.items()}
+
+def get_cached_headers(key: HeaderKey) -> Optional[Dict[str, List[str]]]:
+    with _header_cache_lock:
+        headers: Optional[Dict[str, List[str]]] = _header_cache.get(key)
+        if headers is None:
+            return None
+        _header_cache.move_to_end(key)
+        return _copy_headers(headers)
+
+def store_cached_headers(key: HeaderKey, headers: Dict[str, List[str]]) -> None:
+    with _header_cache_lock:
+        _header_cache[key] = _copy_headers(headers)
+        _header_cache.move_to_end(key)
+        while len(_header_cache) > HEADER_CACHE_SIZE:
+            _header_cache.popitem(last=False)
+
+def clear_header_cache() -> None:
+    with _header_cache_lock:
+        _header_cache.clear()
+
+def header_sidecar_path(path: str) -> str:
+    folder, name = os.path.split(os.path.abspath(path))
+    return os.path.join(folder, f".{name}.headers.json")
+
+def _read_sidecar(path: str, key: HeaderKey) -> Optional[Dict[str, List[str]]]:
+    try:
+        with open(header_sidecar_path(path), "r", encoding="utf-8") as f:
+            data: Dict[str, Any] = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("size") != key[1] or data.get("mtime_ns") != key[2]:
+        return None
+    headers: Any = data.get("headers")
+    return headers if isinstance(headers, dict) else None
+
+def _write_sidecar(path: str, key: HeaderKey, headers: Dict[str, List[str]]) -> None:
+    try:
+        with open(header_sidecar_path(path), "w", encoding="utf-8") as f:
+            json.dump({"size": key[1], "mtime_ns": key[2], "headers": headers}, f)
+    except OSError:
+        pass
+
+def read_workbook_headers(
+    path: str, use_cache: bool = True, sidecar: bool = False, reader: str = "openpyxl"
+) -> Dict[str, List[str]]:
+    key: HeaderKey = file_signature(path)
+    if use_cache:
+        cached: Optional[Dict[str, List[str]]] = get_cached_headers(key)
+        if cached is not None:
+            return cached
+        if sidecar:
+            cached = _read_sidecar(path, key)
+            if cached is not None:
+                store_cached_headers(key, cached)
+                return cached
+    wb: Any = open_reader(path, reader)
     headers_by_sheet: Dict[str, List[str]] = {}
     for ws in wb.worksheets:
-        headers: List[str] = []
-        first_row: Optional[Tuple[Any, ...]] = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
-        if first_row:
-            headers = [safe_str(h).strip() for h in first_row]
-            while headers and headers[-1] == "":
-                headers.pop()
-        headers_by_sheet[ws.title] = headers
+        headers_by_sheet[ws.title] = worksheet_headers(ws)
     wb.close()
+    if use_cache:
+        store_cached_headers(key, headers_by_sheet)
+        if sidecar:
+            _write_sidecar(path, key, headers_by_sheet)
     return headers_by_sheet
 
+# Zip compression levels accepted for outputs: 0 stores entries uncompressed, 1-9 are zlib levels
+COMPRESS_LEVELS: Tuple[int, ...] = tuple(range(10))
+
+def zip_compression(compress_level: Optional[int] = None) -> Tuple[int, Optional[int]]:
+    # (zipfile compression, compresslevel) for an output; None keeps zlib's default level
+    if compress_level is None:
+        return zipfile.ZIP_DEFLATED, None
+    if compress_level not in COMPRESS_LEVELS:
+        raise ValueError(f"Compression level must be between 0 and 9, got {compress_level!r}")
+    if compress_level == 0:
+        return zipfile.ZIP_STORED, None
+    return zipfile.ZIP_DEFLATED, compress_level
+
+def temp_output_path(output_path: str) -> str:
+    # An empty file beside output_path, so that replace_output can move the finished file into
+    # place with a single rename. Created like open() would create it, so its mode follows the umask
+    folder: str = os.path.dirname(os.path.abspath(output_path))
+    prefix: str = f".{os.path.basename(output_path)}."
+    while True:
+        path: str = os.path.join(folder, f"{prefix}{os.urandom(6).hex()}.tmp")
+        try:
+            fd: int = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:
+            continue
+        os.close(fd)
+        return path
+
+def replace_output(temp_path: str, output_path: str) -> None:
+    # Readers of output_path see either the previous file or the complete new one; a file being
+    # replaced keeps its permissions
+    if os.path.exists(output_path):
+        shutil.copymode(output_path, temp_path)
+    os.replace(temp_path, output_path)
+
+def remove_output(temp_path: str) -> None:
+    try:
+        os.remove(temp_path)
+    except FileNotFoundError:
+        pass
+
 def suggest_header_mapping(target_headers: List[str], source_headers: List[str]) -> Dict[str, str]:
     mapping: Dict[str, str] = {}
     source_lower: Dict[str, str] = {h.lower(): h for h in source_headers}
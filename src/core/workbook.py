@@ -0,0 +1,85 @@
+import os
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple, Union
+from openpyxl.workbook.workbook import Workbook
+from .utils import file_signature, worksheet_headers, get_cached_headers, store_cached_headers
+from .xlsx_reader import XlsxReader, open_reader
+# Previews open the source with the native reader so the first rows show without loading the
+# whole shared strings table, and read at most this many raw rows per preview row
+PREVIEW_READER: str = "native"
+PREVIEW_SCAN_FACTOR: int = 20
+
+class WorkbookSession:
+    """One read-only parse of a workbook, shared by header reads, spec building, preview and save."""
+
+    def __init__(self, path: str, reader: str = "openpyxl") -> None:
+        # reader is one of READERS: openpyxl's read-only workbook, or the native XlsxReader
+        self.path: str = path
+        self.reader: str = reader
+        self.signature: Tuple[str, int, int] = file_signature(path)
+        self.wb: Union[Workbook, XlsxReader] = open_reader(path, reader)
+        self._headers: Optional[Dict[str, List[str]]] = None
+
+    def __enter__(self) -> "WorkbookSession":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return self.wb.sheetnames
+
+    @property
+    def headers(self) -> Dict[str, List[str]]:
+        if self._headers is None:
+            cached: Optional[Dict[str, List[str]]] = get_cached_headers(self.signature)
+            if cached is None:
+                cached = {ws.title: worksheet_headers(ws) for ws in self.wb.worksheets}
+                store_cached_headers(self.signature, cached)
+            self._headers = cached
+        return self._headers
+
+    def sheet_headers(self, sheet: str) -> List[str]:
+        return self.headers.get(sheet, [])
+
+    def max_row(self, sheet: str) -> Optional[int]:
+        return self.wb[sheet].max_row
+
+    def iter_rows(self, sheet: str, min_row: int = 2, max_row: Optional[int] = None) -> Iterator[Tuple[Any, ...]]:
+        return self.wb[sheet].iter_rows(min_row=min_row, max_row=max_row, values_only=True)
+
+    def matches(self, path: Optional[str]) -> bool:
+        return bool(path) and os.path.abspath(path) == self.signature[0]
+
+    def is_stale(self) -> bool:
+        try:
+            return file_signature(self.path) != self.signature
+        except OSError:
+            return True
+
+    def close(self) -> None:
+        self.wb.close()
+
+class CountedRows:
+    """Passes rows through, counting how many were read."""
+
+    def __init__(self, rows: Iterable[Tuple[Any, ...]]) -> None:
+        self.rows: Iterator[Tuple[Any, ...]] = iter(rows)
+        self.count: int = 0
+
+    def __iter__(self) -> "CountedRows":
+        return self
+
+    def __next__(self) -> Tuple[Any, ...]:
+        row: Tuple[Any, ...] = next(self.rows)
+        self.count += 1
+        return row
+
+def open_workbook(path: str, reader: str = "openpyxl") -> WorkbookSession:
+    return WorkbookSession(path, reader)
+
+def use_session(path: str, session: Optional[WorkbookSession], reader: str = "openpyxl") -> Tuple[WorkbookSession, bool]:
+    # Returns (session, owned); owned sessions were opened here and must be closed by the caller
+    if session is not None and session.matches(path):
+        return session, False
+    return WorkbookSession(path, reader), True
@@ -0,0 +1,202 @@
+import time
+import zipfile
+from datetime import datetime, timezone
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import Cell, MergedCell
+from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.writer.excel import ExcelWriter
+from .utils import remove_output, replace_output, temp_output_path, zip_compression
+from .xlsx_writer import XlsxWriter
+from .sinks import ArrowWriter, CsvWriter
+
+# Receives (column index, stage, seconds) from append_profiled
+StageRecorder = Callable[[int, str, float], None]
+
+WRITE_MODES: Tuple[str, ...] = ("auto", "standard", "streaming", "native")
+
+# xlsx uses the write mode's workbook writer; the others are the file sinks in sinks.py
+OUTPUT_FORMATS: Tuple[str, ...] = ("xlsx", "csv", "parquet", "arrow")
+
+# Above this many source rows "auto" switches to the write-only workbook so memory stays flat
+STREAMING_ROW_THRESHOLD: int = 50_000
+
+def save_workbook(wb: Workbook, output_path: str, compress_level: Optional[int] = None) -> None:
+    # Workbook.save with a chosen zip compression level (see utils.zip_compression); the file is
+    # written beside output_path and renamed into place once complete
+    compression, level = zip_compression(compress_level)
+    if wb.write_only and not wb.worksheets:
+        wb.create_sheet()
+    temp_path: str = temp_output_path(output_path)
+    try:
+        with zipfile.ZipFile(temp_path, "w", compression, allowZip64=True, compresslevel=level) as archive:
+            wb.properties.modified = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+            ExcelWriter(wb, archive).save()
+        replace_output(temp_path, output_path)
+    finally:
+        remove_output(temp_path)
+
+class WorkbookWriter:
+    """Builds the output with a regular openpyxl workbook; every cell is kept until save."""
+
+    def __init__(self, compress_level: Optional[int] = None) -> None:
+        zip_compression(compress_level)
+        self.compress_level: Optional[int] = compress_level
+        self.wb: Workbook = Workbook()
+        if self.wb.active and len(self.wb.worksheets) == 1 and self.wb.active.title == "Sheet":
+            self.wb.remove(self.wb.active)
+        self.ws: Optional[Worksheet] = None
+        self.number_formats: List[str] = []
+        self.row_idx: int = 1
+
+    def add_sheet(
+        self,
+        title: str,
+        headers: Sequence[str],
+        number_formats: Sequence[str] = (),
+        data_types: Sequence[Optional[str]] = (),
+    ) -> None:
+        self.ws = self.wb.create_sheet(title=title)
+        for c_idx, header in enumerate(headers, start=1):
+            self.ws.cell(row=1, column=c_idx, value=header)
+        self.number_formats = list(number_formats)
+        self.row_idx = 2
+
+    def append(self, row: Sequence[Any]) -> None:
+        ws: Worksheet = self.ws
+        for c_idx, (v, nf) in enumerate(zip(row, self.number_formats), start=1):
+            cell: Union[Cell, MergedCell] = ws.cell(row=self.row_idx, column=c_idx, value=v)
+            if nf and isinstance(cell, Cell):
+                try:
+                    cell.number_format = nf
+                except Exception:
+                    pass
+        self.row_idx += 1
+
+    def append_profiled(self, row: Sequence[Any], record: StageRecorder) -> None:
+        # append() with the cell write and number_format assignment timed per column
+        clock: Callable[[], float] = time.perf_counter
+        ws: Worksheet = self.ws
+        for c_idx, (v, nf) in enumerate(zip(row, self.number_formats), start=1):
+            t0: float = clock()
+            cell: Union[Cell, MergedCell] = ws.cell(row=self.row_idx, column=c_idx, value=v)
+            t1: float = clock()
+            record(c_idx - 1, "write", t1 - t0)
+            if nf and isinstance(cell, Cell):
+                try:
+                    cell.number_format = nf
+                except Exception:
+                    pass
+                record(c_idx - 1, "number_format", clock() - t1)
+        self.row_idx += 1
+
+    def save(self, output_path: str) -> None:
+        save_workbook(self.wb, output_path, self.compress_level)
+
+    def close(self) -> None:
+        pass
+
+class StreamingWorkbookWriter:
+    """Writes rows straight through an openpyxl write-only workbook as they are appended."""
+
+    def __init__(self, compress_level: Optional[int] = None) -> None:
+        zip_compression(compress_level)
+        self.compress_level: Optional[int] = compress_level
+        self.wb: Workbook = Workbook(write_only=True)
+        self.ws: Any = None
+        self.styled: List[Tuple[int, WriteOnlyCell, str]] = []
+        self.width: int = 0
+
+    def add_sheet(
+        self,
+        title: str,
+        headers: Sequence[str],
+        number_formats: Sequence[str] = (),
+        data_types: Sequence[Optional[str]] = (),
+    ) -> None:
+        self.ws = self.wb.create_sheet(title=title)
+        self.ws.append(list(headers))
+        self.width = len(number_formats)
+        # One pre-styled cell per formatted column, re-used for every row since append serialises immediately
+        self.styled = []
+        for idx, nf in enumerate(number_formats):
+            if nf:
+                cell: WriteOnlyCell = WriteOnlyCell(self.ws)
+                try:
+                    cell.number_format = nf
+                except Exception:
+                    continue
+                self.styled.append((idx, cell, nf))
+
+    def append(self, row: Sequence[Any]) -> None:
+        values: List[Any] = list(row[:self.width])
+        n: int = len(values)
+        for idx, cell, nf in self.styled:
+            if idx >= n:
+                continue
+            cell.value = values[idx]
+            if cell.data_type == "d":
+                # Binding a date switches the cell to a date format; the column format wins
+                cell.number_format = nf
+            values[idx] = cell
+        self.ws.append(values)
+
+    def append_profiled(self, row: Sequence[Any], record: StageRecorder) -> None:
+        # append() with number_format binding timed per column; ws.append serialises the whole row
+        # at once, so its time is split evenly across the row's columns
+        clock: Callable[[], float] = time.perf_counter
+        values: List[Any] = list(row[:self.width])
+        n: int = len(values)
+        for idx, cell, nf in self.styled:
+            if idx >= n:
+                continue
+            t0: float = clock()
+            cell.value = values[idx]
+            if cell.data_type == "d":
+                cell.number_format = nf
+            values[idx] = cell
+            record(idx, "number_format", clock() - t0)
+        t0 = clock()
+        self.ws.append(values)
+        share: float = (clock() - t0) / n if n else 0.0
+        for idx in range(n):
+            record(idx, "write", share)
+
+    def save(self, output_path: str) -> None:
+        save_workbook(self.wb, output_path, self.compress_level)
+
+    def close(self) -> None:
+        pass
+
+OutputWriter = Union[WorkbookWriter, StreamingWorkbookWriter, XlsxWriter, CsvWriter, ArrowWriter]
+
+def resolve_write_mode(write_mode: str, estimated_rows: Optional[int]) -> str:
+    if write_mode not in WRITE_MODES:
+        raise ValueError(f"Unknown write mode: {write_mode!r} (expected one of {', '.join(WRITE_MODES)})")
+    if write_mode != "auto":
+        return write_mode
+    # Unsized sources are treated as large
+    if estimated_rows is None or estimated_rows > STREAMING_ROW_THRESHOLD:
+        return "streaming"
+    return "standard"
+
+def create_writer(
+    write_mode: str,
+    output_path: Optional[str] = None,
+    shared_strings: bool = False,
+    compress_level: Optional[int] = None,
+    output_format: str = "xlsx",
+) -> OutputWriter:
+    # shared_strings only applies to the native writer; write_mode only to xlsx output
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format!r} (expected one of {', '.join(OUTPUT_FORMATS)})")
+    if output_format == "csv":
+        return CsvWriter(output_path, compress_level)
+    if output_format != "xlsx":
+        return ArrowWriter(output_path, output_format, compress_level)
+    if write_mode == "native":
+        return XlsxWriter(output_path, shared_strings, compress_level)
+    if write_mode == "streaming":
+        return StreamingWorkbookWriter(compress_level)
+    return WorkbookWriter(compress_level)
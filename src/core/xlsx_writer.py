@@ -0,0 +1,336 @@
+import re
+import time
+import zipfile
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Any, Callable, Dict, IO, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape, quoteattr
+from openpyxl.cell.cell import ERROR_CODES, ILLEGAL_CHARACTERS_RE, TIME_FORMATS
+from openpyxl.compat.numbers import NUMERIC_TYPES
+from openpyxl.styles.numbers import BUILTIN_FORMATS_REVERSE
+from openpyxl.utils.cell import get_column_letter
+from openpyxl.utils.datetime import to_excel
+from openpyxl.utils.exceptions import IllegalCharacterError
+from openpyxl.workbook.child import INVALID_TITLE_REGEX, avoid_duplicate_name
+from openpyxl.writer.theme import theme_xml
+from openpyxl.xml.constants import SHEET_MAIN_NS
+from .utils import remove_output, replace_output, temp_output_path, zip_compression
+
+# Native streaming workbook writer: each row is serialised to sheet XML as it is appended and
+# written straight into the output zip, so no cell objects are built and memory holds a few rows
+# (plus the shared strings table when shared_strings=True). Cell values, types and number formats
+# read back the same as from openpyxl's writers.
+
+# Receives (column index, stage, seconds) from append_profiled
+StageRecorder = Callable[[int, str, float], None]
+
+REL_NS: str = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS: str = "http://schemas.openxmlformats.org/package/2006/relationships"
+SHEET_TYPE: str = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+
+# Rows are buffered and written to the zip in blocks of this many
+FLUSH_ROWS: int = 512
+# Strings are cut to Excel's cell limit, like openpyxl does
+MAX_STRING_LENGTH: int = 32767
+# First id for number formats that are not built into Excel
+FIRST_CUSTOM_FORMAT: int = 164
+
+_XML_DECLARATION: str = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_SHEET_START: str = f'{_XML_DECLARATION}<worksheet xmlns="{SHEET_MAIN_NS}"><sheetData>'
+_SHEET_END: str = "</sheetData></worksheet>"
+
+_INFINITIES: Tuple[float, float] = (float("inf"), float("-inf"))
+# Integers below this print the same with str() as with openpyxl's "%.16g"
+_EXACT_INT: int = 10 ** 16
+
+def _number(value: Any) -> str:
+    # openpyxl's safe_string: NaN and infinity are written as empty values
+    if type(value) is int and -_EXACT_INT < value < _EXACT_INT:
+        return str(value)
+    if value != value or value in _INFINITIES:
+        return ""
+    return "%.16g" % value
+
+def _text(value: str) -> Tuple[str, str]:
+    # (escaped text, xml:space attribute); leading or trailing blanks are kept the way openpyxl keeps them
+    space: str = ""
+    if (value[:1].isspace() or value[-1:].isspace()) and not value.isspace():
+        space = ' xml:space="preserve"'
+    if "&" in value or "<" in value or ">" in value:
+        value = escape(value)
+    return value, space
+
+class XlsxWriter:
+    """Streams rows into an .xlsx file; add_sheet/append/save like the openpyxl-based writers.
+
+    The workbook is written to a temporary file next to ``output_path`` and moved into place by
+    ``save``; ``close`` removes it when the run stops before saving. ``shared_strings`` stores
+    each distinct string once (smaller files for repetitive text) instead of inline in every cell.
+    ``compress_level`` is the zip compression level: 0 stores entries uncompressed, 1-9 are zlib
+    levels and None is zlib's default.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        shared_strings: bool = False,
+        compress_level: Optional[int] = None,
+    ) -> None:
+        compression, level = zip_compression(compress_level)
+        self.temp_path: str = temp_output_path(output_path)
+        self.zip: Optional[zipfile.ZipFile] = zipfile.ZipFile(
+            self.temp_path, "w", compression=compression, compresslevel=level, allowZip64=True
+        )
+        self.shared_strings: bool = shared_strings
+        self.strings: Dict[str, int] = {}
+        self.titles: List[str] = []
+        self.stream: Optional[IO[bytes]] = None
+        self.buffer: List[str] = []
+        # Number format -> cellXfs index; index 0 is the default "General" style
+        self.formats: Dict[str, int] = {"General": 0}
+        self.letters: List[str] = []
+        self.styles: List[str] = []
+        self.date_styles: List[Optional[str]] = []
+        self.width: int = 0
+        self.row_idx: int = 1
+
+    def _style(self, number_format: str) -> str:
+        # ' s="n"' attribute for a number format, adding it to the style table on first use
+        index: Optional[int] = self.formats.get(number_format)
+        if index is None:
+            index = self.formats[number_format] = len(self.formats)
+        return f' s="{index}"' if index else ""
+
+    def _letters(self, width: int) -> List[str]:
+        while len(self.letters) < width:
+            self.letters.append(get_column_letter(len(self.letters) + 1))
+        return self.letters
+
+    def add_sheet(
+        self,
+        title: str,
+        headers: Sequence[str],
+        number_formats: Sequence[str] = (),
+        data_types: Sequence[Optional[str]] = (),
+    ) -> None:
+        self._end_sheet()
+        if title is None:
+            title = "Sheet"
+        match: Optional[re.Match] = INVALID_TITLE_REGEX.search(title)
+        if match:
+            raise ValueError(f"Invalid character {match.group(0)} found in sheet title")
+        self.titles.append(avoid_duplicate_name(self.titles, title))
+        self.stream = self.zip.open(f"xl/worksheets/sheet{len(self.titles)}.xml", "w", force_zip64=True)
+        self.buffer = [_SHEET_START]
+        self.width = len(number_formats)
+        self._letters(max(self.width, len(headers)))
+        # A column's format applies to every value; dates in unformatted columns get openpyxl's
+        # default format for their type (date_styles None)
+        self.styles = [self._style(nf) if nf else "" for nf in number_formats]
+        self.date_styles = [self._style(nf) if nf else None for nf in number_formats]
+        self.row_idx = 1
+        self._write_row(list(headers), [""] * len(headers), [None] * len(headers))
+
+    def _end_sheet(self) -> None:
+        if self.stream is None:
+            return
+        self.buffer.append(_SHEET_END)
+        self._flush()
+        self.stream.close()
+        self.stream = None
+
+    def _flush(self) -> None:
+        self.stream.write("".join(self.buffer).encode("utf-8"))
+        self.buffer = []
+
+    def _cell(self, ref: str, value: Any, style: str, date_style: Optional[str]) -> str:
+        # Same typing rules as openpyxl's Cell: strings may be formulas or error codes, dates
+        # become serial numbers, anything else unknown is rejected
+        if isinstance(value, str):
+            value = value[:MAX_STRING_LENGTH]
+            if ILLEGAL_CHARACTERS_RE.search(value):
+                raise IllegalCharacterError(f"{value} cannot be used in worksheets.")
+            if not value:
+                return f'<c r="{ref}"{style} t="inlineStr"/>'
+            if len(value) > 1 and value.startswith("="):
+                return f'<c r="{ref}"{style}><f>{escape(value[1:])}</f><v></v></c>'
+            if value in ERROR_CODES:
+                return f'<c r="{ref}"{style} t="e"><v>{escape(value)}</v></c>'
+            if self.shared_strings:
+                index: Optional[int] = self.strings.get(value)
+                if index is None:
+                    index = self.strings[value] = len(self.strings)
+                return f'<c r="{ref}"{style} t="s"><v>{index}</v></c>'
+            text, space = _text(value)
+            return f'<c r="{ref}"{style} t="inlineStr"><is><t{space}>{text}</t></is></c>'
+        if isinstance(value, bool):
+            return f'<c r="{ref}"{style} t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, NUMERIC_TYPES):
+            return f'<c r="{ref}"{style} t="n"><v>{_number(value)}</v></c>'
+        if isinstance(value, (datetime, date, dt_time, timedelta)):
+            if getattr(value, "tzinfo", None) is not None:
+                raise TypeError(
+                    "Excel does not support timezones in datetimes. "
+                    "The tzinfo in the datetime/time object must be set to None."
+                )
+            if date_style is None:
+                date_style = self._style(TIME_FORMATS[_time_type(value)])
+            return f'<c r="{ref}"{date_style} t="n"><v>{_number(to_excel(value))}</v></c>'
+        raise ValueError("Cannot convert {0!r} to Excel".format(value))
+
+    def _write_row(self, row: Sequence[Any], styles: Sequence[str], date_styles: Sequence[Optional[str]]) -> None:
+        # Plain inline strings and numbers are written here; everything else goes through _cell
+        r: str = str(self.row_idx)
+        parts: List[str] = [f'<row r="{r}">']
+        letters: List[str] = self.letters
+        inline: bool = not self.shared_strings
+        illegal: Callable[[str], Any] = ILLEGAL_CHARACTERS_RE.search
+        for i, value in enumerate(row):
+            t: type = type(value)
+            if value is None:
+                # Formatted empty cells are kept so the column format shows when they are filled in
+                if styles[i]:
+                    parts.append(f'<c r="{letters[i]}{r}"{styles[i]}/>')
+            elif t is str and inline and value and value[0] not in "=#" and len(value) <= MAX_STRING_LENGTH \
+                    and not illegal(value):
+                text, space = _text(value)
+                parts.append(f'<c r="{letters[i]}{r}"{styles[i]} t="inlineStr"><is><t{space}>{text}</t></is></c>')
+            elif t is float or t is int:
+                parts.append(f'<c r="{letters[i]}{r}"{styles[i]} t="n"><v>{_number(value)}</v></c>')
+            else:
+                parts.append(self._cell(letters[i] + r, value, styles[i], date_styles[i]))
+        parts.append("</row>")
+        self.buffer.append("".join(parts))
+        self.row_idx += 1
+        if len(self.buffer) >= FLUSH_ROWS:
+            self._flush()
+
+    def append(self, row: Sequence[Any]) -> None:
+        self._write_row(row[:self.width], self.styles, self.date_styles)
+
+    def append_profiled(self, row: Sequence[Any], record: StageRecorder) -> None:
+        # append() timed as a whole; the row is serialised at once, so its time is split evenly
+        # across the row's columns
+        clock: Callable[[], float] = time.perf_counter
+        values: Sequence[Any] = row[:self.width]
+        t0: float = clock()
+        self._write_row(values, self.styles, self.date_styles)
+        n: int = len(values)
+        share: float = (clock() - t0) / n if n else 0.0
+        for idx in range(n):
+            record(idx, "write", share)
+
+    def _styles_xml(self) -> str:
+        custom: List[str] = []
+        xfs: List[str] = []
+        next_id: int = FIRST_CUSTOM_FORMAT
+        for number_format in self.formats:
+            fmt_id: Optional[int] = BUILTIN_FORMATS_REVERSE.get(number_format)
+            if fmt_id is None:
+                fmt_id = next_id
+                next_id += 1
+                custom.append(f'<numFmt numFmtId="{fmt_id}" formatCode={quoteattr(number_format)}/>')
+            applied: str = ' applyNumberFormat="1"' if fmt_id else ""
+            xfs.append(f'<xf numFmtId="{fmt_id}" fontId="0" fillId="0" borderId="0" xfId="0"{applied}/>')
+        return (
+            f'{_XML_DECLARATION}<styleSheet xmlns="{SHEET_MAIN_NS}">'
+            f'<numFmts count="{len(custom)}">{"".join(custom)}</numFmts>'
+            '<fonts count="1"><font><sz val="11"/><color theme="1"/><name val="Calibri"/><family val="2"/>'
+            '<scheme val="minor"/></font></fonts>'
+            '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+            '<fill><patternFill patternType="gray125"/></fill></fills>'
+            '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+            '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            f'<cellXfs count="{len(xfs)}">{"".join(xfs)}</cellXfs>'
+            '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            '</styleSheet>'
+        )
+
+    def _shared_strings_xml(self) -> str:
+        items: List[str] = []
+        for value in self.strings:
+            text, space = _text(value)
+            items.append(f"<si><t{space}>{text}</t></si>")
+        count: int = len(items)
+        return f'{_XML_DECLARATION}<sst xmlns="{SHEET_MAIN_NS}" count="{count}" uniqueCount="{count}">{"".join(items)}</sst>'
+
+    def _package_parts(self) -> List[Tuple[str, str]]:
+        n: int = len(self.titles)
+        sheets: str = "".join(
+            f'<sheet name={quoteattr(title)} sheetId="{i}" r:id="rId{i}"/>' for i, title in enumerate(self.titles, 1)
+        )
+        rels: List[str] = [
+            f'<Relationship Id="rId{i}" Type="{REL_NS}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, n + 1)
+        ]
+        rels.append(f'<Relationship Id="rId{n + 1}" Type="{REL_NS}/styles" Target="styles.xml"/>')
+        rels.append(f'<Relationship Id="rId{n + 2}" Type="{REL_NS}/theme" Target="theme/theme1.xml"/>')
+        overrides: List[str] = [
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="{SHEET_TYPE}"/>' for i in range(1, n + 1)
+        ]
+        overrides.append(
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        )
+        overrides.append(
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        )
+        overrides.append(
+            '<Override PartName="/xl/theme/theme1.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.theme+xml"/>'
+        )
+        parts: List[Tuple[str, str]] = []
+        if self.strings:
+            rels.append(f'<Relationship Id="rId{n + 3}" Type="{REL_NS}/sharedStrings" Target="sharedStrings.xml"/>')
+            overrides.append(
+                '<Override PartName="/xl/sharedStrings.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            )
+            parts.append(("xl/sharedStrings.xml", self._shared_strings_xml()))
+        parts.extend([
+            ("xl/styles.xml", self._styles_xml()),
+            ("xl/theme/theme1.xml", theme_xml),
+            ("xl/workbook.xml", (
+                f'{_XML_DECLARATION}<workbook xmlns="{SHEET_MAIN_NS}" xmlns:r="{REL_NS}"><workbookPr/>'
+                f'<bookViews><workbookView activeTab="0"/></bookViews><sheets>{sheets}</sheets></workbook>'
+            )),
+            ("xl/_rels/workbook.xml.rels", f'{_XML_DECLARATION}<Relationships xmlns="{PKG_REL_NS}">{"".join(rels)}</Relationships>'),
+            ("_rels/.rels", (
+                f'{_XML_DECLARATION}<Relationships xmlns="{PKG_REL_NS}">'
+                f'<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="xl/workbook.xml"/></Relationships>'
+            )),
+            ("[Content_Types].xml", (
+                f'{_XML_DECLARATION}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                f'<Default Extension="xml" ContentType="application/xml"/>{"".join(overrides)}</Types>'
+            )),
+        ])
+        return parts
+
+    def save(self, output_path: str) -> None:
+        if not self.titles:
+            # Like openpyxl's write-only workbook, an output needs at least one sheet
+            self.add_sheet("Sheet", [])
+        self._end_sheet()
+        for name, xml in self._package_parts():
+            self.zip.writestr(name, xml)
+        self.zip.close()
+        self.zip = None
+        replace_output(self.temp_path, output_path)
+
+    def close(self) -> None:
+        # Drops the partly written file of a run that stopped before save
+        if self.zip is not None:
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+            self.zip.close()
+            self.zip = None
+        remove_output(self.temp_path)
+
+def _time_type(value: Any) -> type:
+    # TIME_FORMATS key for a date/time value, including subclasses (datetime is itself a date)
+    for t in (datetime, date, dt_time, timedelta):
+        if isinstance(value, t):
+            return t
+    return type(value)
@@ -3,6 +3,7 @@
 
 from .main_window import MainWindow
 from .preview_dialog import PreviewDialog
+from .preview_model import PreviewTableModel
 from .mapping_table import MappingTable
 from .transform_button import TransformButton
 
@@ -0,0 +1,112 @@
+import threading
+from typing import Any, Callable, Dict, Optional
+from PySide6 import QtCore, QtWidgets
+from ..core.progress import Cancelled, EngineObserver
+
+class EngineTaskSignals(QtCore.QObject):
+    progress = QtCore.Signal(str, int)  # target sheet, rows done in that sheet
+    finished = QtCore.Signal(object)    # task result
+    failed = QtCore.Signal(str)
+    cancelled = QtCore.Signal()
+
+class SignalObserver(EngineObserver):
+    """Forwards engine progress from the worker thread as queued Qt signals."""
+
+    collect_timings = False
+
+    def __init__(self, signals: EngineTaskSignals) -> None:
+        self.signals: EngineTaskSignals = signals
+
+    def on_sheet_start(self, sheet: str, estimated_rows: Optional[int]) -> None:
+        self.signals.progress.emit(sheet, 0)
+
+    def on_rows(self, sheet: str, rows: int) -> None:
+        self.signals.progress.emit(sheet, rows)
+
+# The task body receives an observer and a cancel event to pass on to the engine
+TaskFunc = Callable[[SignalObserver, threading.Event], Any]
+
+class EngineTask(QtCore.QRunnable):
+    """Runs an engine call on the global QThreadPool; results come back through queued signals."""
+
+    def __init__(self, func: TaskFunc) -> None:
+        super().__init__()
+        self.func: TaskFunc = func
+        self.signals: EngineTaskSignals = EngineTaskSignals()
+        self.cancel_event: threading.Event = threading.Event()
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    def run(self) -> None:
+        try:
+            result: Any = self.func(SignalObserver(self.signals), self.cancel_event)
+        except Cancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+class EngineProgressDialog(QtWidgets.QProgressDialog):
+    """Window-modal progress for an EngineTask; Cancel asks the engine to stop at its next check.
+
+    The task's signals are connected to slots on this dialog, so they are delivered on the GUI thread.
+    """
+
+    def __init__(
+        self,
+        title: str,
+        label: str,
+        on_finished: Callable[[Any], None],
+        on_failed: Callable[[str], None],
+        total_rows: Optional[int] = None,
+        parent=None,
+    ) -> None:
+        # A zero maximum shows a busy indicator when the row count is unknown
+        super().__init__(label, "Cancel", 0, total_rows or 0, parent)
+        self.setWindowTitle(title)
+        self.setWindowModality(QtCore.Qt.WindowModality.WindowModal)
+        self.setMinimumDuration(300)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.label: str = label
+        self.total_rows: Optional[int] = total_rows
+        self.on_finished: Callable[[Any], None] = on_finished
+        self.on_failed: Callable[[str], None] = on_failed
+        # Latest row count per sheet; the bar shows their sum
+        self.done: Dict[str, int] = {}
+        self.task: Optional[EngineTask] = None
+
+    def start(self, task: EngineTask) -> None:
+        self.task = task
+        task.signals.progress.connect(self.task_progress)
+        task.signals.finished.connect(self.task_finished)
+        task.signals.failed.connect(self.task_failed)
+        task.signals.cancelled.connect(self.task_cancelled)
+        self.canceled.connect(task.cancel)
+        QtCore.QThreadPool.globalInstance().start(task)
+
+    @QtCore.Slot(str, int)
+    def task_progress(self, sheet: str, rows: int) -> None:
+        self.done[sheet] = rows
+        self.setLabelText(f"{self.label}\n{sheet}: {rows:,} rows")
+        if self.total_rows:
+            self.setValue(min(sum(self.done.values()), self.total_rows))
+
+    @QtCore.Slot(object)
+    def task_finished(self, result: Any) -> None:
+        self.close()
+        self.task = None
+        self.on_finished(result)
+
+    @QtCore.Slot(str)
+    def task_failed(self, message: str) -> None:
+        self.close()
+        self.task = None
+        self.on_failed(message)
+
+    @QtCore.Slot()
+    def task_cancelled(self) -> None:
+        self.close()
+        self.task = None
@@ -1,11 +1,18 @@
 import json
-from typing import Dict, Any, List, Optional, Union
+from typing import Callable, Dict, Any, List, Optional, Union
 from PySide6 import QtCore, QtGui, QtWidgets
 from ..core.models import MappingSpec, ColumnMapping, TRANSFORM_CHOICES, TYPE_CHOICES
-from ..core.engine import build_initial_spec, generate_preview_data, apply_template
+from ..core.engine import build_initial_spec, apply_template, estimate_source_rows
 from ..core.utils import read_workbook_headers, safe_str
+from ..core.workbook import PREVIEW_READER, WorkbookSession
+from ..core.preview import PreviewSession
 from .mapping_table import MappingTable
 from .preview_dialog import PreviewDialog
+from .engine_task import EngineProgressDialog, EngineTask, TaskFunc
+
+# Rows computed per sheet when the preview opens; more are read as the table scrolls, up to the limit
+PREVIEW_FIRST_ROWS: int = 1000
+PREVIEW_MAX_ROWS: int = 200_000
 
 class MainWindow(QtWidgets.QMainWindow):
     def on_table_selection(self, row: int) -> None:
@@ -52,17 +59,21 @@ class MainWindow(QtWidgets.QMainWindow):
         source_path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Select Source Workbook", filter="Excel (*.xlsx)")
         if not source_path:
             return
+        # Template headers come from the header cache; the source is parsed once and kept for preview and save
         try:
-            template_headers: Dict[str, List[str]] = read_workbook_headers(template_path)
-            source_headers: Dict[str, List[str]] = read_workbook_headers(source_path)
+            template_headers: Dict[str, List[str]] = read_workbook_headers(template_path, sidecar=True)
+            source_wb: WorkbookSession = WorkbookSession(source_path, PREVIEW_READER)
+            source_headers: Dict[str, List[str]] = source_wb.headers
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Load Files", f"Failed to read headers:\n{e}")
             return
         try:
-            self.spec = build_initial_spec(template_path, source_path)
+            self.spec = build_initial_spec(template_path, source_path, source=source_wb)
         except Exception as e:
+            source_wb.close()
             QtWidgets.QMessageBox.critical(self, "Load Files", f"Failed to build mapping spec:\n{e}")
             return
+        self.set_source_session(source_wb)
         self.template_headers = template_headers
         self.source_headers = source_headers
         self.template_label.setText(f"Template: {template_path}")
@@ -147,8 +158,34 @@ class MainWindow(QtWidgets.QMainWindow):
         self.spec: Optional[MappingSpec] = None
         self.template_headers: Dict[str, List[str]] = {}
         self.source_headers: Dict[str, List[str]] = {}
+        self.source_session: Optional[WorkbookSession] = None
+        self.preview_session: Optional[PreviewSession] = None
+        self.engine_progress: Optional[EngineProgressDialog] = None
         self._build_ui()
 
+    def set_source_session(self, session: Optional[WorkbookSession]) -> None:
+        if self.source_session is not None and self.source_session is not session:
+            self.source_session.close()
+        self.source_session = session
+
+    def current_source_session(self) -> Optional[WorkbookSession]:
+        # Re-use the open source workbook unless the spec points elsewhere or the file changed on disk
+        if not self.spec or not self.spec.source_path:
+            return None
+        session: Optional[WorkbookSession] = self.source_session
+        if session is None or not session.matches(self.spec.source_path) or session.is_stale():
+            session = WorkbookSession(self.spec.source_path, PREVIEW_READER)
+            self.set_source_session(session)
+        return session
+
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        # A running preview/save still reads the source workbook; stop it before closing the file
+        if self.engine_progress is not None and self.engine_progress.task is not None:
+            self.engine_progress.task.cancel()
+            QtCore.QThreadPool.globalInstance().waitForDone()
+        self.set_source_session(None)
+        super().closeEvent(event)
+
     def _build_ui(self) -> None:
         from ..layouts.top_file_row import create_top_file_row
         from ..layouts.source_label_row import create_source_label_row
@@ -252,17 +289,65 @@ class MainWindow(QtWidgets.QMainWindow):
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Import", f"Failed to import mapping:\n{e}")
 
+    def run_engine_task(
+        self,
+        title: str,
+        label: str,
+        func: TaskFunc,
+        on_finished: Callable[[Any], None],
+        total_rows: Optional[int] = None,
+    ) -> None:
+        # Engine calls run on the thread pool so the window stays responsive; one task at a time
+        if self.engine_progress is not None and self.engine_progress.task is not None:
+            return
+
+        def on_failed(message: str) -> None:
+            QtWidgets.QMessageBox.critical(self, title, f"{title} failed:\n{message}")
+
+        self.engine_progress = EngineProgressDialog(title, label, on_finished, on_failed, total_rows, self)
+        self.engine_progress.start(EngineTask(func))
+
     def on_preview(self) -> None:
         if not self.spec:
             return
         self.apply_from_table()
         try:
-            pv: Dict[str, Dict[str, Any]] = generate_preview_data(self.spec, max_rows_per_sheet=1000)
+            # Preview rows are kept between previews; only columns edited since the last one are recomputed
+            source: Optional[WorkbookSession] = self.current_source_session()
+            if self.preview_session is None or not self.preview_session.matches(self.spec, source):
+                self.preview_session = PreviewSession(self.spec, max_rows_per_sheet=PREVIEW_FIRST_ROWS, source=source)
+            else:
+                self.preview_session.refresh()
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Preview", f"Failed to generate preview:\n{e}")
             return
-        dlg: PreviewDialog = PreviewDialog(self.spec, pv, self)
-        dlg.exec()
+        session: PreviewSession = self.preview_session
+        idx: int = self.target_combo.currentIndex()
+        if not (0 <= idx < len(self.spec.sheets)):
+            idx = 0
+        sheet_name: str = self.spec.sheets[idx].target_sheet if self.spec.sheets else ""
+
+        def show_dialog(_: Any) -> None:
+            # The selected sheet is computed in the background; other tabs are computed when first selected
+            dlg: PreviewDialog = PreviewDialog(
+                self.spec,
+                session.sheet_data,
+                self,
+                current=idx,
+                more=session.iter_remaining,
+                max_rows=PREVIEW_MAX_ROWS,
+            )
+            dlg.exec()
+
+        if not sheet_name:
+            show_dialog(None)
+            return
+        self.run_engine_task(
+            "Preview",
+            "Generating preview...",
+            lambda observer, cancel: session.sheet_data(sheet_name, observer.on_rows, cancel),
+            show_dialog,
+        )
 
     def on_save(self) -> None:
         if not self.spec:
@@ -286,10 +371,26 @@ class MainWindow(QtWidgets.QMainWindow):
                 from copy import deepcopy
                 spec_to_download = deepcopy(self.spec)
                 spec_to_download.sheets = [spec_to_download.sheets[idx]]
-            apply_template(spec_to_download, out_path)
-            QtWidgets.QMessageBox.information(self, "Download", f"Output saved to:\n{out_path}")
+            # The open session reads with the native preview reader; it only sizes the progress bar.
+            # The output itself is read with apply_template's default openpyxl reader
+            preview_source: Optional[WorkbookSession] = self.current_source_session()
+            total_rows: Optional[int] = (
+                estimate_source_rows(spec_to_download, preview_source) if preview_source else None
+            )
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Download", f"Failed to save output:\n{e}")
+            return
+
+        def saved(_: Any) -> None:
+            QtWidgets.QMessageBox.information(self, "Download", f"Output saved to:\n{out_path}")
+
+        self.run_engine_task(
+            "Download",
+            "Writing output workbook...",
+            lambda observer, cancel: apply_template(spec_to_download, out_path, observer=observer, cancel=cancel),
+            saved,
+            total_rows,
+        )
 
     def on_apply_details(self) -> None:
         sm = self.current_sheet()
@@ -315,4 +416,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 replace_item = self.detail_find_replace.item(row_idx, 1)
                 if find_item and replace_item and find_item.text() and replace_item.text():
                     col.find_replace[find_item.text()] = replace_item.text()
+
+        if self.preview_session is not None and self.preview_session.matches(self.spec, self.source_session):
+            self.preview_session.update_column(sm.target_sheet, row)
         QtWidgets.QMessageBox.information(self, "Details", f"Applied settings to: {col.target}")
\ No newline at end of file
@@ -1,35 +1,98 @@
-from PySide6 import QtWidgets
-from typing import Dict, Any
+from PySide6 import QtCore, QtGui, QtWidgets
+from typing import Callable, Dict, Any, Iterator, List, Optional, Set, Union
 from ..core.models import MappingSpec
+from .preview_model import PreviewTableModel
+
+# Returns one sheet's preview ({"headers", "rows", "truncated", "sampled_rows", ...}) given its target sheet name
+SheetLoader = Callable[[str], Dict[str, Any]]
+# Returns the rows following a sheet's preview, read lazily as the table scrolls
+MoreRows = Callable[[str], Iterator[List[Any]]]
 
 class PreviewDialog(QtWidgets.QDialog):
-    def __init__(self, spec: MappingSpec, preview: Dict[str, Dict[str, Any]], parent=None):
+    def __init__(
+        self,
+        spec: MappingSpec,
+        preview: Union[Dict[str, Dict[str, Any]], SheetLoader],
+        parent=None,
+        current: int = 0,
+        more: Optional[MoreRows] = None,
+        max_rows: Optional[int] = None,
+    ):
         super().__init__(parent)
         self.setWindowTitle("Preview")
         self.resize(1000, 700)
+        self.spec = spec
+        if callable(preview):
+            self.loader: SheetLoader = preview
+        else:
+            self.loader = lambda name: preview.get(name, {"headers": self._sheet_headers(name), "rows": [], "truncated": False})
+        self.more: Optional[MoreRows] = more
+        self.max_rows: Optional[int] = max_rows
+        self.loaded: Set[int] = set()
         vbox = QtWidgets.QVBoxLayout(self)
-        tabs = QtWidgets.QTabWidget(self)
-        vbox.addWidget(tabs)
+        self.tabs = QtWidgets.QTabWidget(self)
+        vbox.addWidget(self.tabs)
+        # Tabs start empty; a sheet's rows are computed the first time its tab is shown
         for sm in spec.sheets:
-            sheet_name = sm.target_sheet
-            data = preview.get(sheet_name, {"headers": sm.target_headers, "rows": [], "truncated": False})
             tab = QtWidgets.QWidget()
-            t_layout = QtWidgets.QVBoxLayout(tab)
-            table = QtWidgets.QTableWidget()
-            table.setColumnCount(len(data["headers"]))
-            table.setHorizontalHeaderLabels(data["headers"])
-            table.setRowCount(0)
-            for r, row in enumerate(data["rows"]):
-                table.insertRow(r)
-                for c, val in enumerate(row):
-                    item = QtWidgets.QTableWidgetItem("" if val is None else str(val))
-                    table.setItem(r, c, item)
-            if data.get("truncated"):
-                lbl = QtWidgets.QLabel("Preview truncated")
-                lbl.setStyleSheet("color:#a00")
-                t_layout.addWidget(lbl)
-            t_layout.addWidget(table)
-            tabs.addTab(tab, sheet_name)
+            QtWidgets.QVBoxLayout(tab)
+            self.tabs.addTab(tab, sm.target_sheet)
+        if 0 <= current < len(spec.sheets):
+            self.tabs.setCurrentIndex(current)
+        self.tabs.currentChanged.connect(self.load_tab)
         btns = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.StandardButton.Close)
         btns.rejected.connect(self.reject)
         vbox.addWidget(btns)
+        if spec.sheets:
+            self.load_tab(self.tabs.currentIndex())
+
+    def _sheet_headers(self, sheet_name: str) -> List[str]:
+        for sm in self.spec.sheets:
+            if sm.target_sheet == sheet_name:
+                return sm.target_headers
+        return []
+
+    def load_tab(self, index: int) -> None:
+        if index < 0 or index in self.loaded:
+            return
+        self.loaded.add(index)
+        sheet_name = self.tabs.tabText(index)
+        t_layout = self.tabs.widget(index).layout()
+        QtWidgets.QApplication.setOverrideCursor(QtGui.QCursor(QtCore.Qt.CursorShape.WaitCursor))
+        try:
+            data = self.loader(sheet_name)
+        except Exception as e:
+            lbl = QtWidgets.QLabel(f"Failed to generate preview:\n{e}")
+            lbl.setStyleSheet("color:#a00")
+            t_layout.addWidget(lbl)
+            return
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        # Further rows are fetched from the source only as the view scrolls towards them
+        more_rows = self.more(sheet_name) if self.more is not None and data.get("truncated") else None
+        model = PreviewTableModel(data["headers"], data["rows"], more_rows, self.max_rows, self)
+        lbl = QtWidgets.QLabel()
+        lbl.setStyleSheet("color:#a00")
+        t_layout.addWidget(lbl)
+        table = QtWidgets.QTableView()
+        table.setModel(model)
+        t_layout.addWidget(table)
+
+        # Source rows read for the preview out of the rows the sheet's dimension announces
+        sampled: Optional[int] = data.get("sampled_rows")
+        total: Optional[int] = data.get("total_rows")
+        sample_text: str = f" (sampled {sampled:,} of ~{total:,} rows)" if sampled is not None and total else ""
+
+        def update_label() -> None:
+            if model.error:
+                text = f"Preview stopped after {model.rowCount():,} rows: {model.error}"
+            elif model.canFetchMore():
+                text = f"Showing {model.rowCount():,} rows; scroll to load more{sample_text}"
+            elif model.at_limit() or (more_rows is None and data.get("truncated")):
+                text = f"Preview truncated at {model.rowCount():,} rows{sample_text}"
+            else:
+                text = ""
+            lbl.setText(text)
+            lbl.setVisible(bool(text))
+        model.fetched.connect(update_label)
+        update_label()
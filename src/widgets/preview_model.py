@@ -0,0 +1,76 @@
+from itertools import islice
+from typing import Any, Iterator, List, Optional, Sequence
+from PySide6 import QtCore
+
+# Rows pulled from the row source each time the view scrolls near the end
+FETCH_ROWS: int = 1000
+
+class PreviewTableModel(QtCore.QAbstractTableModel):
+    """Read-only table model over preview rows; only visible cells are ever rendered.
+
+    Rows beyond the initial list are pulled from ``more`` in FETCH_ROWS batches as the view
+    scrolls (canFetchMore/fetchMore), up to ``max_rows``.
+    """
+
+    # Emitted after every fetchMore, including the one that finds the row source exhausted
+    fetched = QtCore.Signal()
+
+    def __init__(
+        self,
+        headers: Sequence[str],
+        rows: List[List[Any]],
+        more: Optional[Iterator[List[Any]]] = None,
+        max_rows: Optional[int] = None,
+        parent: Optional[QtCore.QObject] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.headers: List[str] = list(headers)
+        self.rows: List[List[Any]] = rows
+        self.more: Optional[Iterator[List[Any]]] = more
+        self.max_rows: Optional[int] = max_rows
+        self.error: Optional[str] = None
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != QtCore.Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        row: List[Any] = self.rows[index.row()]
+        val: Any = row[index.column()] if index.column() < len(row) else None
+        return "" if val is None else str(val)
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation, role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Orientation.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return str(section + 1)
+
+    def at_limit(self) -> bool:
+        return self.max_rows is not None and len(self.rows) >= self.max_rows
+
+    def canFetchMore(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> bool:
+        return not parent.isValid() and self.more is not None and not self.at_limit()
+
+    def fetchMore(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> None:
+        if not self.canFetchMore(parent):
+            return
+        n: int = FETCH_ROWS if self.max_rows is None else min(FETCH_ROWS, self.max_rows - len(self.rows))
+        try:
+            batch: List[List[Any]] = list(islice(self.more, n))
+        except Exception as e:
+            batch = []
+            self.error = str(e)
+            self.more = None
+        if len(batch) < n:
+            self.more = None
+        if batch:
+            first: int = len(self.rows)
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + len(batch) - 1)
+            self.rows.extend(batch)
+            self.endInsertRows()
+        self.fetched.emit()
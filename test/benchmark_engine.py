@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Excel Template Mapper - Engine Benchmarks
+Generates synthetic template/source workbooks and times the engine on them.
+
+Results (seconds, rows/s and peak Python memory per step) are written to a JSON file
+that can be compared with an earlier run:
+
+    python3 test/benchmark_engine.py --preset medium --out bench.json
+    python3 test/benchmark_engine.py --preset medium --compare bench.json
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from openpyxl import Workbook
+
+from src.core.engine import build_initial_spec, generate_preview_data, apply_template
+from src._version import __version__
+
+DATA_TYPES = ["text", "integer", "float", "date", "boolean"]
+
+# Column data types as type=weight pairs; columns cycle through the weighted pattern in order
+DEFAULT_TYPE_MIX = "text=1,integer=1,float=1,date=1,boolean=1"
+
+PRESETS = {
+    "small": {"rows": 2_000, "cols": 10, "sheets": 1},
+    "medium": {"rows": 50_000, "cols": 20, "sheets": 1},
+    "wide": {"rows": 20_000, "cols": 80, "sheets": 1},
+    "multi-sheet": {"rows": 20_000, "cols": 20, "sheets": 4},
+    "large": {"rows": 250_000, "cols": 30, "sheets": 1},
+}
+
+# apply_template variants measured for every scenario
+APPLY_MODES = {
+    "row": {},
+    "streaming": {"write_mode": "streaming"},
+    "columnar": {"columnar": True},
+    "workers": {"workers": 0},
+    "native": {"reader": "native"},
+    "native-write": {"reader": "native", "write_mode": "native"},
+}
+
+# A step is reported as a regression when it is this much slower than the compared run
+REGRESSION_THRESHOLD = 0.20
+
+def make_value(rnd, data_type, i):
+    """A source cell value for the given column type, stored the way users' sources usually are"""
+    if data_type == "text":
+        return rnd.choice([" north ", "south", "East", "west ", "CENTRAL", ""]) + f"-{i % 97}"
+    if data_type == "integer":
+        return str(rnd.randint(0, 100_000))
+    if data_type == "float":
+        return f"{rnd.uniform(0, 10_000):,.2f}"
+    if data_type == "date":
+        d = datetime(2020, 1, 1) + timedelta(days=rnd.randint(0, 2_000))
+        return d.strftime(rnd.choice(["%Y-%m-%d", "%m/%d/%Y"]))
+    return rnd.choice(["yes", "no", "Y", "N", "true", "false"])
+
+def parse_type_mix(text):
+    """'text=2,date=1' -> ['text', 'text', 'date']; raises ValueError for unknown, repeated or badly weighted types"""
+    pattern = []
+    seen = set()
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DATA_TYPES:
+            raise ValueError(f"unknown data type {name!r} (expected one of {', '.join(DATA_TYPES)})")
+        if name in seen:
+            raise ValueError(f"{name} given more than once")
+        seen.add(name)
+        try:
+            count = int(weight) if weight.strip() else 1
+        except ValueError:
+            raise ValueError(f"bad weight for {name}: {weight!r}") from None
+        if count < 0:
+            raise ValueError(f"bad weight for {name}: {weight!r}")
+        pattern.extend([name] * count)
+    if not pattern:
+        raise ValueError(f"no column types in {text!r}")
+    return pattern
+
+def format_type_mix(type_mix):
+    """The canonical type=weight text for a parsed mix, as recorded in the results file"""
+    return ",".join(f"{name}={type_mix.count(name)}" for name in dict.fromkeys(type_mix))
+
+def generate_workbooks(tmp_dir, rows, cols, sheets, seed=0, type_mix=DATA_TYPES):
+    """Write a template and a source workbook; returns (template_path, source_path, column types)"""
+    rnd = random.Random(seed)
+    headers = [f"Col{c:03d}" for c in range(cols)]
+    types = [type_mix[c % len(type_mix)] for c in range(cols)]
+    template_path = str(Path(tmp_dir) / "bench_template.xlsx")
+    source_path = str(Path(tmp_dir) / "bench_source.xlsx")
+
+    wb = Workbook(write_only=True)
+    for s in range(sheets):
+        wb.create_sheet(f"Out{s}").append(headers + ["Derived"])
+    wb.save(template_path)
+
+    wb = Workbook(write_only=True)
+    for s in range(sheets):
+        ws = wb.create_sheet(f"Data{s}")
+        ws.append(headers)
+        for i in range(rows):
+            ws.append([make_value(rnd, t, i) for t in types])
+    wb.save(source_path)
+    return template_path, source_path, types
+
+def configure_spec(spec, types, replace_density, advanced_rules):
+    """Apply transforms, types, find/replace tables and advanced rules like a real mapping would"""
+    for sm in spec.sheets:
+        cols = sm.columns
+        n_replace = int(round(len(types) * replace_density))
+        for c, (col, data_type) in enumerate(zip(cols, types)):
+            col.data_type = data_type
+            if data_type == "text":
+                col.transforms = ["trim", "title"]
+            elif data_type == "float":
+                col.number_format = "#,##0.00"
+            elif data_type == "date":
+                col.number_format = "yyyy-mm-dd"
+            if c < n_replace:
+                col.find_replace = {f"North-{k}": f"N{k}" for k in range(5)}
+        derived = cols[-1]
+        derived.advanced_rules = [
+            {"ref": cols[r % len(types)].target, "op": "contains", "match": "North", "set": f"rule{r}"}
+            for r in range(advanced_rules)
+        ]
+        derived.advanced_else = "other"
+    return spec
+
+def measure(func, track_memory):
+    """Run func once; returns (seconds, peak traced bytes or None)"""
+    if track_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        func()
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if track_memory else None
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+    return seconds, peak
+
+def run_scenario(name, rows, cols, sheets, replace_density, advanced_rules, modes, track_memory, seed=0,
+                 type_mix=DATA_TYPES):
+    """Time every engine step for one generated workbook pair"""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="etm-bench-") as tmp:
+        template_path, source_path, types = generate_workbooks(tmp, rows, cols, sheets, seed, type_mix)
+        total_rows = rows * sheets
+        holder = {}
+
+        def build():
+            holder["spec"] = build_initial_spec(template_path, source_path)
+
+        steps = [("build_initial_spec", build, None)]
+        steps.append(("generate_preview_data", lambda: generate_preview_data(holder["spec"]), min(rows, 1000) * sheets))
+        for mode in modes:
+            out_path = str(Path(tmp) / f"out_{mode}.xlsx")
+            kwargs = APPLY_MODES[mode]
+            steps.append((f"apply_template[{mode}]", lambda o=out_path, k=kwargs: apply_template(holder["spec"], o, **k), total_rows))
+
+        for step, func, step_rows in steps:
+            # Timing and memory are measured in separate runs; tracing allocations slows Python down
+            seconds, _ = measure(func, False)
+            if step == "build_initial_spec":
+                configure_spec(holder["spec"], types, replace_density, advanced_rules)
+            peak = measure(func, True)[1] if track_memory else None
+            if step == "build_initial_spec":
+                configure_spec(holder["spec"], types, replace_density, advanced_rules)
+            result = {
+                "scenario": name,
+                "step": step,
+                "rows": step_rows,
+                "seconds": round(seconds, 4),
+                "rows_per_second": round(step_rows / seconds) if step_rows and seconds > 0 else None,
+                "peak_memory_mb": round(peak / 2**20, 2) if peak is not None else None,
+            }
+            results.append(result)
+            rate = f"{result['rows_per_second']:>10,} rows/s" if result["rows_per_second"] else " " * 17
+            memory = f"{result['peak_memory_mb']:>9.1f} MB" if peak is not None else ""
+            print(f"  {step:<28} {seconds:8.3f}s {rate} {memory}")
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(project_root), capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(results, previous_path, settings):
+    """Print the change per step against an earlier results file; returns the number of regressions
+
+    Runs with different workload settings (type mix, find/replace density, advanced rules, seed)
+    are not compared.
+    """
+    with open(previous_path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    # Results files written before --types existed used the default mix
+    previous_settings = {"types": DEFAULT_TYPE_MIX, **report.get("settings", {})}
+    differing = [key for key in settings if previous_settings.get(key) != settings[key]]
+    if differing:
+        print(f"\n⚠️  Not compared with {previous_path}: different {', '.join(differing)}")
+        for key in differing:
+            print(f"   {key}: {previous_settings.get(key)!r} -> {settings[key]!r}")
+        return 0
+    previous = {(r["scenario"], r["step"]): r for r in report["results"]}
+    regressions = 0
+    print(f"\n📈 Compared with {previous_path}:")
+    for r in results:
+        old = previous.get((r["scenario"], r["step"]))
+        if not old or not old["seconds"]:
+            continue
+        change = r["seconds"] / old["seconds"] - 1
+        flag = ""
+        if change > REGRESSION_THRESHOLD:
+            flag = "  ❌ slower"
+            regressions += 1
+        elif change < -REGRESSION_THRESHOLD:
+            flag = "  ✅ faster"
+        print(f"   {r['scenario']:<12} {r['step']:<28} {old['seconds']:8.3f}s -> {r['seconds']:8.3f}s {change:+7.1%}{flag}")
+    return regressions
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the Excel Template Mapper engine on synthetic workbooks.")
+    parser.add_argument("--preset", action="append", choices=sorted(PRESETS),
+                        help="scenario to run; repeatable (default: small)")
+    parser.add_argument("--rows", type=int, help="source rows per sheet (overrides the preset)")
+    parser.add_argument("--cols", type=int, help="mapped columns per sheet (overrides the preset)")
+    parser.add_argument("--sheets", type=int, help="target/source sheet pairs (overrides the preset)")
+    parser.add_argument("--replace-density", type=float, default=0.25,
+                        help="share of columns with a find/replace table (default: 0.25)")
+    parser.add_argument("--advanced-rules", type=int, default=3, help="advanced rules on the derived column (default: 3)")
+    parser.add_argument("--types", default=DEFAULT_TYPE_MIX,
+                        help="column data-type mix as type=weight pairs, e.g. text=2,date=1,float=1; "
+                             f"types: {', '.join(DATA_TYPES)} (default: one of each)")
+    parser.add_argument("--modes", default=",".join(APPLY_MODES),
+                        help=f"apply_template variants, comma separated (default: {','.join(APPLY_MODES)})")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="benchmark_results.json", help="results file (default: benchmark_results.json)")
+    parser.add_argument("--compare", help="earlier results file; exit code 1 if any step is more than 20%% slower")
+    return parser
+
+def main(argv=None):
+    """Run the selected benchmark scenarios."""
+    args = build_parser().parse_args(argv)
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in APPLY_MODES]
+    if unknown:
+        print(f"❌ Unknown mode(s): {', '.join(unknown)}")
+        return 2
+    try:
+        type_mix = parse_type_mix(args.types)
+    except ValueError as e:
+        print(f"❌ --types: {e}")
+        return 2
+    types = format_type_mix(type_mix)
+
+    print("⏱️  Excel Template Mapper - Engine Benchmarks")
+    print("=" * 60)
+    results = []
+    for preset in args.preset or ["small"]:
+        size = dict(PRESETS[preset])
+        for key in ("rows", "cols", "sheets"):
+            if getattr(args, key) is not None:
+                size[key] = getattr(args, key)
+        print(f"\n🧪 {preset}: {size['rows']:,} rows x {size['cols']} columns x {size['sheets']} sheet(s), types {types}")
+        results.extend(run_scenario(
+            preset, size["rows"], size["cols"], size["sheets"], args.replace_density,
+            args.advanced_rules, modes, not args.no_memory, args.seed, type_mix,
+        ))
+
+    settings = {
+        "types": types,
+        "replace_density": args.replace_density,
+        "advanced_rules": args.advanced_rules,
+        "seed": args.seed,
+    }
+
+    report = {
+        "version": __version__,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "settings": settings,
+        "results": results,
+    }
+    regressions = compare(results, args.compare, settings) if args.compare else 0
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {args.out}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
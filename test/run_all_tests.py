@@ -63,6 +63,7 @@ def main():
     # Define test suites
     test_suites = [
         ("test_imports.py", "Import & Functionality Tests"),
+        ("test_engine.py", "Engine Tests"),
         ("test_type_hints.py", "Type Hints Validation"),
         ("test_packaging.py", "Package Build Tests"),
         ("test_docker.py", "Docker Tests"),
@@ -0,0 +1,680 @@
+#!/usr/bin/env python3
+"""
+Excel Template Mapper - Engine Tests
+Validates the mapping engine end to end on small generated workbooks.
+"""
+
+import io
+import sys
+import csv
+import json
+import subprocess
+import zipfile
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from openpyxl import Workbook, load_workbook
+
+from src.core.engine import (
+    build_initial_spec, generate_preview_data, generate_sheet_preview, apply_template,
+    apply_transforms, replace_values, coerce_value, apply_advanced_to_cell,
+)
+from src.core.pipeline import compile_sheet, compile_replacer, compile_date_coercer, load_format_column
+from concurrent.futures import Future
+from src.core import parallel
+from src.core.parallel import iter_rows_chunked
+from src.core.columnar import ColumnarPlan
+from src.core.workbook import WorkbookSession
+from src.core.batch import run_batch, expand_sources
+from src.core.preview import PreviewSession
+from src.core.progress import Cancelled, RunStats, PHASES
+from src.core.profiling import MappingProfile
+from src.core.writers import WorkbookWriter
+from src.core.sinks import ARROW_COLUMN_TYPES, PYARROW_AVAILABLE, convert_column
+from src.core.xlsx_writer import XlsxWriter
+from src.cli import ConsoleObserver
+from src.core import utils
+
+SOURCE_ROWS = [
+    ["Name", "State", "Amount", "Joined"],
+    [" alice ", "ca", "1,234.50", "2024-01-05"],
+    ["bob", "NY", "7", "01/02/2024"],
+    [None, None, None, None],
+    ["carol", "ca", "x", "45000"],
+]
+
+def make_workbooks(tmp_dir):
+    """Create a template and source workbook pair in tmp_dir"""
+    template_path = str(Path(tmp_dir) / "template.xlsx")
+    source_path = str(Path(tmp_dir) / "source.xlsx")
+    wb = Workbook()
+    wb.active.title = "Out"
+    wb.active.append(["Name", "State", "Amount", "Joined", "Region"])
+    wb.save(template_path)
+    wb = Workbook()
+    wb.active.title = "Data"
+    for row in SOURCE_ROWS:
+        wb.active.append(row)
+    wb.save(source_path)
+    return template_path, source_path
+
+def make_spec(template_path, source_path):
+    """Build a spec exercising transforms, find/replace, types and rules"""
+    spec = build_initial_spec(template_path, source_path)
+    sm = spec.sheets[0]
+    cols = {c.target: c for c in sm.columns}
+    cols["Name"].transforms = ["trim", "title"]
+    cols["State"].transforms = ["upper"]
+    cols["State"].find_replace = {"CA": "California"}
+    cols["Amount"].data_type = "float"
+    cols["Amount"].number_format = "0.00"
+    cols["Joined"].data_type = "date"
+    cols["Region"].default = "Unknown"
+    cols["Region"].advanced_rules = [{"ref": "State", "op": "equals", "match": "California", "set": "West"}]
+    return spec
+
+def expected_rows(spec):
+    """Reference result computed with the scalar engine functions"""
+    sm = spec.sheets[0]
+    src_index = {h: i for i, h in enumerate(SOURCE_ROWS[0])}
+    rows = []
+    for row in SOURCE_ROWS[1:]:
+        out = []
+        for col in sm.columns:
+            val = row[src_index[col.source]] if col.source in src_index else None
+            val = apply_transforms(val, col.transforms)
+            val = replace_values(val, spec.global_find_replace)
+            val = replace_values(val, col.find_replace)
+            if (val is None or str(val).strip() == "") and col.default not in (None, ""):
+                val = col.default
+            out.append(coerce_value(val, col.data_type))
+        row_map = dict(zip(sm.target_headers, out))
+        out = [apply_advanced_to_cell(col, row_map, v) for col, v in zip(sm.columns, out)]
+        if all(v is None or (isinstance(v, str) and v.strip() == "") for v in out):
+            continue
+        rows.append(out)
+    return rows
+
+def test_build_initial_spec():
+    """Initial spec picks the source sheet and maps matching headers"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = build_initial_spec(*make_workbooks(tmp))
+        sm = spec.sheets[0]
+        assert sm.source_sheet == "Data"
+        assert [c.source for c in sm.columns] == ["Name", "State", "Amount", "Joined", None]
+
+def test_compiled_plan_matches_scalar_functions():
+    """The compiled sheet plan produces the same rows as the scalar functions"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        plan = compile_sheet(spec.sheets[0], SOURCE_ROWS[0], spec.global_find_replace)
+        rows = list(plan.iter_rows(SOURCE_ROWS[1:]))
+        assert rows == expected_rows(spec)
+        assert rows[0] == ["Alice", "California", 1234.5, datetime(2024, 1, 5), "West"]
+
+def test_preview_and_apply_template():
+    """Preview rows and saved output agree with each other"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        preview = generate_preview_data(spec, max_rows_per_sheet=2)
+        assert preview["Out"]["truncated"] is True
+        assert len(preview["Out"]["rows"]) == 2
+
+        out_path = str(Path(tmp) / "out.xlsx")
+        apply_template(spec, out_path)
+        ws = load_workbook(out_path)["Out"]
+        values = [list(r) for r in ws.iter_rows(values_only=True)]
+        assert values[0] == spec.sheets[0].target_headers
+        # Empty strings are not stored in xlsx and read back as None
+        assert values[1:] == [[None if v == "" else v for v in r] for r in expected_rows(spec)]
+        assert ws["C2"].number_format == "0.00"
+
+def test_streaming_write_mode():
+    """Streaming (write-only) output matches the standard workbook output"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        results = []
+        for mode in ("standard", "streaming"):
+            out_path = str(Path(tmp) / f"out_{mode}.xlsx")
+            apply_template(spec, out_path, write_mode=mode)
+            ws = load_workbook(out_path)["Out"]
+            results.append([[(c.value, c.number_format) for c in r] for r in ws.iter_rows()])
+        assert results[0] == results[1]
+
+def test_shared_workbook_session():
+    """A shared source session serves spec building, preview and save"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path, source_path = make_workbooks(tmp)
+        with WorkbookSession(source_path) as source:
+            spec = build_initial_spec(template_path, source_path, source=source)
+            assert spec.sheets[0].source_sheet == "Data"
+            preview = generate_preview_data(spec, source=source)
+            apply_template(spec, str(Path(tmp) / "out.xlsx"), source=source)
+            # The session stays usable after being shared
+            assert source.headers["Data"] == SOURCE_ROWS[0]
+            assert len(list(source.iter_rows("Data"))) == len(SOURCE_ROWS) - 1
+            # The all-blank source row is dropped
+            assert len(preview["Out"]["rows"]) == len(SOURCE_ROWS) - 2
+
+def test_header_cache():
+    """Header cache serves repeat reads and invalidates when the file changes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path, _ = make_workbooks(tmp)
+        utils.clear_header_cache()
+        first = utils.read_workbook_headers(template_path, sidecar=True)
+        assert Path(utils.header_sidecar_path(template_path)).exists()
+        first["Out"].append("mutated")
+        assert utils.read_workbook_headers(template_path) != first
+
+        utils.clear_header_cache()
+        assert utils.read_workbook_headers(template_path, sidecar=True)["Out"][-1] == "Region"
+
+        wb = Workbook()
+        wb.active.title = "Out"
+        wb.active.append(["Changed", "Headers"])
+        wb.save(template_path)
+        assert utils.read_workbook_headers(template_path, sidecar=True) == {"Out": ["Changed", "Headers"]}
+
+def test_parallel_sheets():
+    """Per-sheet process pool output matches the sequential output"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path, source_path = make_workbooks(tmp)
+        wb = load_workbook(template_path)
+        wb.copy_worksheet(wb["Out"]).title = "Out2"
+        wb.create_sheet("Unmapped").append(["Nothing"])
+        wb.save(template_path)
+        spec = make_spec(template_path, source_path)
+        results = []
+        for workers in (1, 2):
+            out_path = str(Path(tmp) / f"out_{workers}.xlsx")
+            apply_template(spec, out_path, workers=workers)
+            results.append([(ws.title, list(ws.iter_rows(values_only=True))) for ws in load_workbook(out_path)])
+        assert [title for title, _ in results[0]] == ["Out", "Out2", "Unmapped"]
+        assert results[0] == results[1]
+
+def test_chunked_rows_preserve_order():
+    """Row chunks transformed in a process pool come back in source order"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        plan = compile_sheet(spec.sheets[0], SOURCE_ROWS[0], spec.global_find_replace)
+        rows = SOURCE_ROWS[1:] * 5
+        assert list(iter_rows_chunked(plan, rows, workers=2, chunk_rows=3)) == list(plan.iter_rows(rows))
+
+def test_advanced_format_sees_source_row():
+    """advanced_format code is compiled once and receives the raw source row"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        cols = {c.target: c for c in spec.sheets[0].columns}
+        cols["Region"].advanced_format = (
+            "import re\n"
+            "def format_column(col, source):\n"
+            "    return re.sub(r'\\s+', '', source['Name'] or '') + '/' + col['State']\n"
+        )
+        plan = compile_sheet(spec.sheets[0], SOURCE_ROWS[0], spec.global_find_replace)
+        rows = list(plan.iter_rows(SOURCE_ROWS[1:]))
+        assert [r[4] for r in rows] == ["alice/California", "bob/NY", "/", "carol/California"]
+        # current_value is not bound inside format_column: the NameError keeps the cell's value
+        cols["Region"].advanced_format = "def format_column(col, source):\n    return current_value\n"
+        plan = compile_sheet(spec.sheets[0], SOURCE_ROWS[0], spec.global_find_replace)
+        kept = [r[4] for r in plan.iter_rows(SOURCE_ROWS[1:])]
+        cols["Region"].advanced_format = ""
+        cols["Region"].advanced_rules = None
+        plain = compile_sheet(spec.sheets[0], SOURCE_ROWS[0], spec.global_find_replace)
+        assert kept == [r[4] for r in plain.iter_rows(SOURCE_ROWS[1:])] and None not in kept
+        # Top-level code that reads the row cannot run up front, so it falls back to running per cell
+        for code in ("state = source['State']\n", "value = current_value\n"):
+            try:
+                load_format_column(code)
+                assert False, f"{code!r} ran without a row"
+            except NameError:
+                pass
+
+def test_columnar_matches_row_engine():
+    """Columnar block conversion produces the same rows as the row engine"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        cols = {c.target: c for c in spec.sheets[0].columns}
+        cols["Amount"].transforms = ["to_float"]
+        plan = compile_sheet(spec.sheets[0], SOURCE_ROWS[0], spec.global_find_replace)
+        numeric_rows = [(n, "ca", i * 1.5, 45000.0) for i, n in enumerate(["a", "b"] * 10)]
+        for rows in (SOURCE_ROWS[1:] * 4, numeric_rows):
+            assert list(ColumnarPlan(plan, block_rows=3).iter_rows(rows)) == list(plan.iter_rows(rows))
+
+def test_cli_run_is_headless():
+    """The CLI applies an exported mapping without importing Qt"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path, source_path = make_workbooks(tmp)
+        mapping_path = str(Path(tmp) / "mapping.json")
+        out_path = str(Path(tmp) / "out.xlsx")
+        with open(mapping_path, "w", encoding="utf-8") as f:
+            json.dump(make_spec(template_path, source_path).to_dict(), f)
+        args = ["run", "--mapping", mapping_path, "--template", template_path,
+                "--source", source_path, "--out", out_path, "--quiet"]
+        code = (
+            "import sys, app_psg\n"
+            f"rc = app_psg.main({args!r})\n"
+            "sys.exit(rc or ('PySide6' in sys.modules and 3))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=str(project_root), capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        assert load_workbook(out_path)["Out"]["A2"].value == "Alice"
+
+def test_batch_mode():
+    """Batch mode applies one mapping to many sources and reports failures per file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path, source_path = make_workbooks(tmp)
+        spec = make_spec(template_path, source_path)
+        src_dir = Path(tmp) / "branches"
+        src_dir.mkdir()
+        for name in ("north", "south"):
+            (src_dir / f"{name}.xlsx").write_bytes(Path(source_path).read_bytes())
+        (src_dir / "broken.xlsx").write_text("not a workbook")
+        (src_dir / "notes.txt").write_text("ignored")
+        sources = expand_sources([str(src_dir)])
+        assert [Path(s).name for s in sources] == ["broken.xlsx", "north.xlsx", "south.xlsx"]
+
+        results = run_batch(spec, sources, str(Path(tmp) / "out"), workers=2)
+        assert [r.ok for r in results] == [False, True, True]
+        assert results[0].error
+        expected = [[None if v == "" else v for v in r] for r in expected_rows(spec)]
+        for r in results[1:]:
+            assert [list(row) for row in load_workbook(r.output_path)["Out"].iter_rows(min_row=2, values_only=True)] == expected
+
+def test_incremental_preview():
+    """Editing one column updates the preview session to match a full preview"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        session = PreviewSession(spec, max_rows_per_sheet=10)
+        assert session.data() == generate_preview_data(spec, max_rows_per_sheet=10)
+        cols = spec.sheets[0].columns
+        # Region's rule reads State, so it is recomputed along with it
+        cols[1].find_replace = {"CA": "Calif"}
+        cols[4].advanced_rules[0]["match"] = "Calif"
+        session.update_column("Out", 1)
+        session.refresh()
+        assert session.data() == generate_preview_data(spec, max_rows_per_sheet=10)
+        spec.sheets[0].drop_if_all_blank = False
+        session.refresh()
+        assert session.data() == generate_preview_data(spec, max_rows_per_sheet=10)
+
+def test_sheet_preview_reads_one_sheet():
+    """A single-sheet preview matches the full preview and reads only that sheet"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path, source_path = make_workbooks(tmp)
+        wb = load_workbook(template_path)
+        wb.copy_worksheet(wb["Out"]).title = "Out2"
+        wb.save(template_path)
+        spec = make_spec(template_path, source_path)
+        full = generate_preview_data(spec)
+        with WorkbookSession(source_path) as source:
+            read = []
+            iter_rows = source.iter_rows
+            source.iter_rows = lambda sheet, *a, **kw: read.append(sheet) or iter_rows(sheet, *a, **kw)
+            assert generate_sheet_preview(spec, "Out2", source=source) == full["Out2"]
+            assert read == ["Data"]
+            session = PreviewSession(spec, source=source)
+            assert session.sheet_data("Out") == full["Out"]
+            assert list(session.states) == ["Out"]
+
+def test_preview_remaining_rows():
+    """Rows after the first preview batch continue where the preview stopped"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        full = generate_preview_data(spec)["Out"]["rows"]
+        for first in (1, 2):
+            session = PreviewSession(spec, max_rows_per_sheet=first)
+            rows = session.sheet_data("Out")["rows"] + list(session.iter_remaining("Out"))
+            assert rows == full
+
+def test_progress_and_cancel():
+    """apply_template reports rows per sheet and stops without saving when cancelled"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        out_path = Path(tmp) / "out.xlsx"
+        reports = []
+        apply_template(spec, str(out_path), progress=lambda sheet, rows: reports.append((sheet, rows)))
+        assert reports[-1] == ("Out", len(expected_rows(spec)))
+
+        cancel = threading.Event()
+        cancel.set()
+        out_path.unlink()
+        try:
+            apply_template(spec, str(out_path), cancel=cancel)
+            assert False, "expected Cancelled"
+        except Cancelled:
+            pass
+        assert not out_path.exists()
+
+def test_parallel_cancel_stops_workers():
+    """Sheet workers stop at the next spilled batch once cancelled, and waiting for one honours cancel"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        spill_path = str(Path(tmp) / "sheet.pkl")
+        stop_path = Path(tmp) / "stop"
+        stop_path.touch()
+        batch_rows = parallel.SPILL_BATCH_ROWS
+        parallel.SPILL_BATCH_ROWS = 1
+        try:
+            written = parallel.transform_sheet_to_spill(
+                spec.source_path, spec.sheets[0], spec.global_find_replace, spill_path, stop_path=str(stop_path)
+            )
+        finally:
+            parallel.SPILL_BATCH_ROWS = batch_rows
+        assert written == 1 < len(expected_rows(spec))
+
+        cancel = threading.Event()
+        cancel.set()
+        try:
+            next(parallel._spilled_rows(Future(), spill_path, cancel))
+            assert False, "expected Cancelled"
+        except Cancelled:
+            pass
+
+def test_observer_reports_sheets_and_phases():
+    """An engine observer sees every sheet with its row count and phase timings"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        for kwargs in ({}, {"columnar": True}):
+            stats = RunStats()
+            apply_template(spec, str(Path(tmp) / "out.xlsx"), observer=stats, **kwargs)
+            assert stats.sheets["Out"]["rows"] == len(expected_rows(spec))
+            assert stats.sheets["Out"]["estimated_rows"] == len(SOURCE_ROWS) - 1
+            assert set(stats.timings) == set(PHASES)
+            assert stats.timings["transform"] > 0 and stats.timings["save"] > 0
+        stats = RunStats()
+        generate_preview_data(spec, observer=stats)
+        assert stats.sheets["Out"]["rows"] == len(expected_rows(spec))
+
+def test_profile_attributes_columns_and_stages():
+    """A profiled run counts every stage per column and still writes the same rows"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        out_path = str(Path(tmp) / "out.xlsx")
+        profile = MappingProfile()
+        apply_template(spec, out_path, profile=profile, columnar=True)
+        values = [list(r) for r in load_workbook(out_path)["Out"].iter_rows(min_row=2, values_only=True)]
+        assert values == [[None if v == "" else v for v in r] for r in expected_rows(spec)]
+
+        report = profile.to_dict()["sheets"]["Out"]
+        cols = {c["target"]: c["stages"] for c in report["columns"]}
+        n = len(SOURCE_ROWS) - 1
+        assert cols["State"]["transforms"]["calls"] == n and cols["State"]["find_replace"]["calls"] == n
+        assert cols["Region"]["advanced"]["calls"] == n
+        assert cols["Amount"]["number_format"]["calls"] == len(expected_rows(spec))
+        assert "coerce" not in cols["Name"]
+        assert report["rows"] == len(expected_rows(spec))
+        profile.write(str(Path(tmp) / "profile.txt"))
+        assert "Out / State" in Path(tmp, "profile.txt").read_text()
+
+def test_replacer_matches_sequential_replace():
+    """Large find/replace tables give the same values as replacing key by key"""
+    codes = {f"C{i:03d}": f"Code {i}" for i in range(200)}
+    chained = {"a": "b", "b": "c", "ab": "x", "cc": "d"}
+    def key_by_key(value, table):
+        s = utils.safe_str(value)
+        if s in table:
+            return table[s]
+        for k, v in table.items():
+            s = s.replace(k, v)
+        return s
+
+    for table in (codes, chained, dict(codes, Code="K")):
+        replace = compile_replacer(table)
+        for value in ("C007", "C007/C199 and C250", "Code C001", "aab", "abcab", "", None, 42):
+            assert replace(value) == key_by_key(value, table)
+    assert compile_replacer(codes)("ship C001, C002") == "ship Code 1, Code 2"
+    assert compile_replacer(chained)("aab") == "dc"
+
+def test_memoized_columns_match_and_report_hits():
+    """Memoized column plans give the same rows and report their cache hit rates"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        plan = compile_sheet(spec.sheets[0], SOURCE_ROWS[0], spec.global_find_replace, memo_size=16)
+        rows = SOURCE_ROWS[1:] * 3
+        assert list(plan.iter_rows(rows)) == expected_rows(spec) * 3
+        state = plan.memo_stats()["State"]
+        assert state["misses"] == 3 and state["hits"] == 9  # "ca", "NY" and None
+
+        stats = RunStats()
+        apply_template(spec, str(Path(tmp) / "out.xlsx"), observer=stats, memo_size=16)
+        assert set(stats.sheets["Out"]["memo"]) >= {"Name", "State", "Amount"}
+        assert compile_sheet(spec.sheets[0], SOURCE_ROWS[0], memo_size=4).columns[0].convert(-0.0) == "-0.0"
+
+def test_date_coercer_prefers_column_format():
+    """A date column's inferred format never changes which listed format parses a value"""
+    coerce = compile_date_coercer(sample=2)
+    assert coerce("25/12/2024") == datetime(2024, 12, 25)
+    assert coerce("31/01/2024") == datetime(2024, 1, 31)
+    # %m/%d/%Y is listed before %d/%m/%Y and still wins for ambiguous dates
+    assert coerce("01/02/2024") == coerce_value("01/02/2024", "date") == datetime(2024, 1, 2)
+    assert coerce("2024-03-04") == datetime(2024, 3, 4)
+    assert coerce(20240105) == datetime(2024, 1, 5)
+    assert coerce(45000) == coerce(45000.0) == datetime(2023, 3, 15)
+    assert coerce(" ") is None and coerce("soon") == "soon"
+
+def test_native_reader_matches_openpyxl():
+    """The native reader yields the same sheets, headers and rows as openpyxl's read-only mode"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "mixed.xlsx")
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Data"
+        ws.append(["Name", "When", "Flag", "Amount"])
+        ws.append(["a", datetime(2024, 1, 5, 10, 30), True, 1.5])
+        ws.append(["b", None, False, 7])
+        ws["B5"] = "after a gap"
+        ws["E6"] = "wider row"
+        wb.create_sheet("Other").append(["x", None, "y"])
+        wb.save(path)
+        with WorkbookSession(path) as expected, WorkbookSession(path, "native") as native:
+            assert native.sheetnames == expected.sheetnames
+            assert native.headers == expected.headers
+            for sheet in expected.sheetnames:
+                assert native.max_row(sheet) == expected.max_row(sheet)
+                for bounds in ((2, None), (1, 3), (4, 10)):
+                    assert list(native.iter_rows(sheet, *bounds)) == list(expected.iter_rows(sheet, *bounds))
+
+def test_preview_scan_is_bounded():
+    """Previews read at most max_scan_rows source rows and report how many were sampled"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path, source_path = make_workbooks(tmp)
+        wb = load_workbook(source_path)
+        for _ in range(30):
+            wb["Data"].append([None, None, None, None])
+        wb["Data"].append(["dave", "ny", "1", "2024-02-03"])
+        wb.save(source_path)
+        spec = make_spec(template_path, source_path)
+        spec.sheets[0].columns[4].default = None
+        sheet = generate_preview_data(spec, max_scan_rows=8)["Out"]
+        assert (sheet["sampled_rows"], sheet["total_rows"], sheet["truncated"]) == (8, 35, True)
+        assert len(sheet["rows"]) == 3
+        assert generate_sheet_preview(spec, "Out", max_scan_rows=8) == sheet
+        session = PreviewSession(spec, max_scan_rows=8)
+        assert session.sheet_data("Out") == sheet
+        # Rows past the sample are still read on demand
+        remaining = list(session.iter_remaining("Out"))
+        assert [r[0] for r in remaining] == ["Dave"]
+        full = generate_preview_data(spec)["Out"]
+        assert (full["sampled_rows"], full["truncated"]) == (35, False)
+        assert full["rows"] == sheet["rows"] + remaining
+
+def test_native_reader_apply_template():
+    """apply_template, workers and header reads give the same results with the native reader"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path, source_path = make_workbooks(tmp)
+        spec = make_spec(template_path, source_path)
+        assert utils.read_workbook_headers(source_path, use_cache=False, reader="native") == \
+            utils.read_workbook_headers(source_path, use_cache=False)
+        outputs = []
+        for i, options in enumerate(({}, {"reader": "native"}, {"reader": "native", "workers": 2})):
+            out_path = str(Path(tmp) / f"out{i}.xlsx")
+            apply_template(spec, out_path, **options)
+            outputs.append([list(r) for r in load_workbook(out_path)["Out"].iter_rows(values_only=True)])
+        assert outputs[0] == outputs[1] == outputs[2]
+        assert len(outputs[0]) == 1 + len(expected_rows(spec))
+
+def test_native_writer_matches_openpyxl():
+    """The native XLSX writer's output reads back like the openpyxl workbook's"""
+    row = [None, "", " padded ", "<&>", "=1+2", "#N/A", True, 7, 2.5, float("nan"), datetime(2024, 1, 5), "x" * 40000]
+    formats = ["0.00", "", "@", "", "", "", "", "#,##0", "", "", "yyyy-mm-dd", ""]
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        results = []
+        for i, (mode, options) in enumerate((("standard", {}), ("native", {}), ("native", {"shared_strings": True, "compress_level": 0}))):
+            out_path = str(Path(tmp) / f"out{i}.xlsx")
+            apply_template(spec, out_path, write_mode=mode, **options)
+            writer = WorkbookWriter() if mode == "standard" else XlsxWriter(str(Path(tmp) / f"cells{i}.xlsx"), **options)
+            writer.add_sheet("Cells", [f"c{n}" for n in range(len(row))], formats)
+            writer.append(row)
+            writer.add_sheet("Cells", ["only"])
+            writer.save(str(Path(tmp) / f"cells{i}.xlsx"))
+            results.append([
+                (ws.title, [[(c.value, c.number_format) for c in r] for r in ws.iter_rows()])
+                for path in (out_path, str(Path(tmp) / f"cells{i}.xlsx")) for ws in load_workbook(path)
+            ])
+        assert results[0] == results[1] == results[2]
+        # A run that stops before saving leaves nothing behind
+        writer = XlsxWriter(str(Path(tmp) / "unsaved.xlsx"))
+        writer.add_sheet("S", ["a"])
+        writer.close()
+        assert not [p for p in Path(tmp).iterdir() if p.suffix == ".tmp"]
+
+def test_compress_level_and_atomic_save():
+    """Every writer honours compress_level and replaces the output only once it is complete"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        for mode in ("standard", "streaming", "native"):
+            outputs = []
+            for level in (None, 0, 9):
+                out_path = str(Path(tmp) / f"out_{mode}_{level}.xlsx")
+                apply_template(spec, out_path, write_mode=mode, compress_level=level)
+                with zipfile.ZipFile(out_path) as zf:
+                    stored = {info.compress_type == zipfile.ZIP_STORED for info in zf.infolist()}
+                assert stored == {level == 0}
+                outputs.append([list(r) for r in load_workbook(out_path)["Out"].iter_rows(values_only=True)])
+            assert outputs[0] == outputs[1] == outputs[2]
+        try:
+            WorkbookWriter(compress_level=10)
+            assert False, "invalid level accepted"
+        except ValueError:
+            pass
+        # A save that fails keeps the previous output and leaves no temporary file
+        out_path = Path(tmp) / "out_standard_None.xlsx"
+        before = out_path.read_bytes()
+        try:
+            WorkbookWriter().save(str(out_path))
+            assert False, "workbook without sheets saved"
+        except IndexError:
+            pass
+        assert out_path.read_bytes() == before
+        assert not [p for p in Path(tmp).iterdir() if p.suffix == ".tmp"]
+        if sys.platform != "win32":
+            # A replaced output keeps the permissions it was given
+            out_path.chmod(0o640)
+            apply_template(spec, str(out_path), write_mode="native")
+            assert out_path.stat().st_mode & 0o777 == 0o640
+
+def test_csv_and_columnar_sinks():
+    """CSV and Parquet/Arrow outputs hold the same rows as the workbook, one file per sheet"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = make_spec(*make_workbooks(tmp))
+        text = [spec.sheets[0].target_headers] + [["" if v is None else str(v) for v in r] for r in expected_rows(spec)]
+        apply_template(spec, str(Path(tmp) / "csv"), output_format="csv")
+        assert [p.name for p in (Path(tmp) / "csv").iterdir()] == ["Out.csv"]
+        with open(Path(tmp) / "csv" / "Out.csv", newline="", encoding="utf-8") as f:
+            assert list(csv.reader(f)) == text
+        apply_template(spec, str(Path(tmp) / "out.zip"), output_format="csv", workers=2)
+        with zipfile.ZipFile(Path(tmp) / "out.zip") as zf:
+            assert zf.namelist() == ["Out.csv"]
+            assert list(csv.reader(io.TextIOWrapper(zf.open("Out.csv"), encoding="utf-8", newline=""))) == text
+        if not PYARROW_AVAILABLE:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        stats = RunStats()
+        apply_template(spec, str(Path(tmp) / "parquet"), output_format="parquet", observer=stats)
+        assert stats.sheets["Out"]["invalid"] == {"Amount": 1}
+        apply_template(spec, str(Path(tmp) / "arrow"), output_format="arrow", compress_level=3)
+        tables = [pq.read_table(Path(tmp) / "parquet" / "Out.parquet"), pa.ipc.open_file(Path(tmp) / "arrow" / "Out.arrow").read_all()]
+        for table in tables:
+            assert [str(t) for t in table.schema.types] == ["string", "string", "double", "timestamp[us]", "string"]
+            # Text left in the float column by a failed coercion becomes null
+            expected = [[None if v == "x" else v for v in r] for r in expected_rows(spec)]
+            assert [list(r.values()) for r in table.to_pylist()] == expected
+
+def test_typed_column_reports_misfits():
+    """Values that do not fit a typed output column become null and are counted"""
+    to_int = ARROW_COLUMN_TYPES["integer"][1]
+    assert convert_column([1, "x", 2.0, None, 2.5], to_int) == ([1, None, 2, None, None], 2)
+    assert convert_column([None, None], to_int) == ([None, None], 0)
+    stats = RunStats()
+    stats.on_invalid_values("Out", {"Amount": 2})
+    assert stats.to_dict()["sheets"]["Out"]["invalid"] == {"Amount": 2}
+    observer = ConsoleObserver()
+    observer.on_invalid_values("Out", {"Amount": 2})
+    assert observer.format_invalid() == "  Out / Amount: 2 value(s) written as null"
+
+def run_test(func):
+    """Run a single test function and report the result"""
+    try:
+        func()
+        print(f"✅ {func.__doc__}")
+        return True
+    except Exception as e:
+        print(f"❌ {func.__doc__}: {e!r}")
+        return False
+
+def main():
+    """Run all engine tests."""
+    print("🧪 Excel Template Mapper - Engine Tests")
+    print("=" * 60)
+
+    tests = [
+        test_build_initial_spec,
+        test_compiled_plan_matches_scalar_functions,
+        test_preview_and_apply_template,
+        test_streaming_write_mode,
+        test_shared_workbook_session,
+        test_header_cache,
+        test_parallel_sheets,
+        test_chunked_rows_preserve_order,
+        test_advanced_format_sees_source_row,
+        test_columnar_matches_row_engine,
+        test_cli_run_is_headless,
+        test_batch_mode,
+        test_incremental_preview,
+        test_sheet_preview_reads_one_sheet,
+        test_preview_remaining_rows,
+        test_progress_and_cancel,
+        test_parallel_cancel_stops_workers,
+        test_observer_reports_sheets_and_phases,
+        test_profile_attributes_columns_and_stages,
+        test_replacer_matches_sequential_replace,
+        test_memoized_columns_match_and_report_hits,
+        test_date_coercer_prefers_column_format,
+        test_native_reader_matches_openpyxl,
+        test_preview_scan_is_bounded,
+        test_native_reader_apply_template,
+        test_native_writer_matches_openpyxl,
+        test_compress_level_and_atomic_save,
+        test_csv_and_columnar_sinks,
+        test_typed_column_reports_misfits,
+    ]
+    results = [run_test(t) for t in tests]
+
+    total_tests = len(results)
+    passed_tests = sum(results)
+    print("\n📊 Test Summary:")
+    print(f"   Total tests: {total_tests}")
+    print(f"   Passed: {passed_tests}")
+    print(f"   Failed: {total_tests - passed_tests}")
+    return 0 if passed_tests == total_tests else 1
+
+if __name__ == "__main__":
+    sys.exit(main())